@@ -0,0 +1,83 @@
+"""
+End-to-end throughput against the local fixture site.
+
+Starts FixtureSite on a free port, runs LocalChScraper against it in a
+throwaway working directory and reports pages/sec and businesses/sec
+from the run's RunMetrics.
+
+    python benchmarks/bench_e2e.py --businesses 500 --concurrency 50
+    python benchmarks/bench_e2e.py --engine browser   # needs Edge + msedgedriver
+"""
+import os, sys, json, time, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_site import FixtureSite
+from juste_scraping import LocalChScraper
+
+
+def run_once(site, engine, concurrency, rate_per_host, workers):
+    server, base_url = site.serve()
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="localch_bench_")
+    os.chdir(workdir)
+    try:
+        scraper = LocalChScraper(
+            excel_path="categories.xlsx", base_url=base_url, log_level="WARNING", snapshot_interval=3600,
+        )
+        started = time.perf_counter()
+        if engine == "async":
+            scraper.run_async(concurrency=concurrency, rate_per_host=rate_per_host)
+        else:
+            scraper.run(workers=workers)
+        elapsed = time.perf_counter() - started
+        summary = scraper.metrics.summary()
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "engine": engine,
+        "expected_businesses": site.total_with_email(),
+        "businesses": summary["businesses"],
+        "pages": summary["pages"],
+        "errors": summary["errors"],
+        "elapsed_s": round(elapsed, 2),
+        "pages_per_s": round(summary["pages"] / elapsed, 1) if elapsed else 0.0,
+        "businesses_per_s": round(summary["businesses"] / elapsed, 1) if elapsed else 0.0,
+        "output_dir": os.path.join(workdir, "scraping_data"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a full crawl against the fixture site.")
+    parser.add_argument("--engine", choices=["async", "browser"], default="async")
+    parser.add_argument("--letters", type=int, default=2)
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--cities", type=int, default=3)
+    parser.add_argument("--businesses", type=int, default=100, help="businesses per city")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests/sec per host (async)")
+    parser.add_argument("--workers", type=int, default=1, help="browser sessions (browser engine)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+
+    site = FixtureSite(letters=args.letters, categories=args.categories, cities=args.cities,
+                       businesses=args.businesses, page_size=args.page_size)
+    for _ in range(args.repeat):
+        result = run_once(site, args.engine, args.concurrency, args.rate, args.workers)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(
+                f"{result['engine']:>7}: {result['pages']} pages, {result['businesses']}/{result['expected_businesses']} "
+                f"businesses in {result['elapsed_s']}s → {result['pages_per_s']} pages/s, "
+                f"{result['businesses_per_s']} businesses/s, {result['errors']} errors"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
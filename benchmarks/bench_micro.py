@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks for the parsers and the output path.
+
+Pages come from FixtureSite, so nothing needs to be served. save_to_json
+and the journal are timed in a throwaway directory.
+
+    python benchmarks/bench_micro.py --number 200
+"""
+import os, sys, time, argparse, tempfile, timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_site import FixtureSite
+import juste_scraping as js
+
+
+def bench(name, func, number):
+    timer = timeit.Timer(func)
+    best = min(timer.repeat(repeat=3, number=number)) / number
+    print(f"{name:<32} {best * 1e6:>10.1f} µs/op")
+    return best
+
+
+def synthetic_data(letters, categories, businesses):
+    data = {}
+    for l in range(letters):
+        column = {}
+        for c in range(categories):
+            column[(f"Category {l}-{c}", "en")] = {
+                "translations": {"name_en": f"Category {l}-{c}", "name_de": f"Kategorie {l}-{c}"},
+                "Bern": [
+                    {"title": f"Business {n}", "address": f"Bahnhofstrasse {n}, 3000 Bern",
+                     "rating": "4.5", "email": f"info@b{n}.ch", "url": f"https://www.local.ch/en/d/bern/b{n}"}
+                    for n in range(businesses)
+                ],
+            }
+        data[chr(ord("A") + l)] = column
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for extractors and save_to_json.")
+    parser.add_argument("--number", type=int, default=100, help="iterations per measurement")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--save-businesses", type=int, default=2000, help="businesses per category in save_to_json")
+    args = parser.parse_args(argv)
+
+    site = FixtureSite(page_size=args.page_size, businesses=args.page_size * 2)
+    base = "http://127.0.0.1"
+    letters_html = site.categories_page()
+    letter_html = site.letter_page("A")
+    category_html = site.category_page("en", "acategory0")
+    cities_html = site.city_list_page("en", "acategory0", "a")
+    listing_html = site.listing_page("en", "bern-0", "acategory0-a", 1)
+    detail_html = site.detail_page("bern-0", "acategory0-a-bern-0-1")
+
+    print(f"parser: {js.HTML_PARSER}")
+    bench("parse_category_letters", lambda: js.parse_category_letters(letters_html, base + "/en/categories"), args.number)
+    bench("parse_categories", lambda: js.parse_categories(letter_html, base + "/en/categories/a"), args.number)
+    bench("parse_category_heading", lambda: js.parse_category_heading(category_html, base), args.number)
+    bench("parse_subletters", lambda: js.parse_subletters(category_html), args.number)
+    bench("parse_cities", lambda: js.parse_cities(cities_html, base), args.number)
+    bench(f"parse_listing_page ({args.page_size} cards)", lambda: js.parse_listing_page(listing_html, base), args.number)
+    bench("parse_detail_page", lambda: js.parse_detail_page(detail_html, base), args.number)
+    bench("is_application_error", lambda: js.is_application_error(detail_html), args.number)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="localch_bench_")
+    os.chdir(workdir)
+    try:
+        scraper = js.LocalChScraper(excel_path="categories.xlsx", log_level="WARNING", snapshot_interval=3600)
+        data = synthetic_data(letters=1, categories=5, businesses=args.save_businesses)
+        total = 5 * args.save_businesses
+        bench(f"save_to_json ({total} businesses)", lambda: scraper.save_to_json(data, "bench.json"), 5)
+
+        record = data["A"][("Category 0-0", "en")]["Bern"][0]
+        bench("_save_business (journal append)",
+              lambda: scraper._save_business("A", "Category 0-0", "en", "Bern", record, "_bench"), args.number * 10)
+
+        started = time.perf_counter()
+        scraper.compact_journal("_bench")
+        print(f"{'compact_journal':<32} {(time.perf_counter() - started) * 1e6:>10.1f} µs/op")
+        scraper.finish_run()
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
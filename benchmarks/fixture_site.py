@@ -0,0 +1,241 @@
+"""
+Local stand-in for local.ch used by the benchmarks.
+
+Serves category, letter, category (sub-letter), city-list, listing and
+detail pages that use the same markup the scraper targets
+(list-element-desktop cards, load-next-page, contact-link,
+detail-map-preview, ratings-section, hreflang alternates). Pages are
+generated deterministically, so the site can be scaled to any number of
+businesses without storing anything on disk.
+
+    python benchmarks/fixture_site.py --port 8765 --businesses 200
+"""
+import os, re, sys, gzip, argparse, threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+LANG_PATHS = {"en": "categories", "de": "kategorien", "fr": "categories", "it": "categorie"}
+HEADING_PREFIX = {
+    "en": "Top cities for",
+    "de": "Top Städte für",
+    "fr": "Top villes pour",
+    "it": "Città più importanti per",
+}
+CITY_NAMES = [
+    ("bern", "Bern"), ("zurich", "Zürich"), ("basel", "Basel"), ("geneve", "Genève"), ("lausanne", "Lausanne"),
+    ("luzern", "Luzern"), ("lugano", "Lugano"), ("st-gallen", "St. Gallen"), ("biel", "Biel"), ("thun", "Thun"),
+]
+
+
+class FixtureSite:
+    """
+    Synthetic site: `letters` A.. letters, `categories` per letter,
+    `cities` per category sub-letter, `businesses` per city shown
+    `page_size` per listing page. Every `no_email_every`-th business has
+    no email and every `shared_every`-th one also appears in other cities
+    (exercising the dedup index).
+    """
+
+    def __init__(self, letters=2, categories=2, subletters=1, cities=2, businesses=20,
+                 page_size=10, no_email_every=5, shared_every=7):
+        self.letters = [chr(ord("A") + i) for i in range(letters)]
+        self.categories = categories
+        self.subletters = [chr(ord("a") + i) for i in range(subletters)]
+        self.cities = cities
+        self.businesses = businesses
+        self.page_size = page_size
+        self.no_email_every = no_email_every
+        self.shared_every = shared_every
+
+    # -------------------- MODEL --------------------
+    def category_slugs(self, letter):
+        return [f"{letter.lower()}category{i}" for i in range(self.categories)]
+
+    def total_businesses(self):
+        return len(self.letters) * self.categories * len(self.subletters) * self.cities * self.businesses
+
+    def total_with_email(self):
+        """Businesses the scraper should save (those without an email are skipped)."""
+        per_city = sum(1 for n in range(self.businesses) if not (self.no_email_every and n % self.no_email_every == 0))
+        return len(self.letters) * self.categories * len(self.subletters) * self.cities * per_city
+
+    def business_id(self, slug, subletter, city, n):
+        if self.shared_every and n % self.shared_every == 0:
+            return f"shared-{n}"
+        return f"{slug}-{subletter}-{city}-{n}"
+
+    # -------------------- PAGES --------------------
+    @staticmethod
+    def _html(body, head=""):
+        return f"<!DOCTYPE html><html><head><meta charset='utf-8'>{head}</head><body>{body}</body></html>"
+
+    def categories_page(self):
+        links = "".join(f'<a href="/en/categories/{l.lower()}">{l}</a>' for l in self.letters)
+        return self._html(f"<h2>Categories from A-Z</h2><div class='az'>{links}</div>")
+
+    def letter_page(self, letter):
+        links = "".join(
+            f'<a href="/en/categories/{letter.lower()}/{slug}">{slug.title()}</a>'
+            for slug in self.category_slugs(letter)
+        )
+        return self._html(f"<div class='c12'>{links}</div>")
+
+    def category_page(self, lang, slug):
+        head = "".join(
+            f'<link rel="alternate" hreflang="{code}" href="/{code}/{path}/{slug[0]}/{slug}">'
+            for code, path in LANG_PATHS.items()
+        )
+        nav = "".join(f'<a href="/{lang}/{LANG_PATHS[lang]}/{slug[0]}/{slug}/{s}">{s.upper()}</a>' for s in self.subletters)
+        return self._html(f"<h1>{HEADING_PREFIX[lang]} {slug.title()}</h1><nav>{nav}</nav>", head)
+
+    def city_list_page(self, lang, slug, subletter):
+        links = []
+        for c in range(self.cities):
+            city_slug, city_name = CITY_NAMES[c % len(CITY_NAMES)]
+            links.append(f'<a href="/{lang}/q/{city_slug}-{c}/{slug}-{subletter}">{slug.title()} in {city_name}</a>')
+        links = "".join(links)
+        return self._html(f"<div class='cC3'>{links}</div>")
+
+    def listing_page(self, lang, city, query, page):
+        slug, _, subletter = query.rpartition("-")
+        start = (page - 1) * self.page_size
+        cards = []
+        for n in range(start, min(start + self.page_size, self.businesses)):
+            business = self.business_id(slug, subletter, city, n)
+            cards.append(
+                f'<article data-testid="list-element-desktop-{n}"><a href="/{lang}/d/{city}/{business}">'
+                f'<h2 data-testid="title" class="lk1">Business {business}</h2></a>'
+                f'<div data-testid="average-rating">4.{n % 10}</div></article>'
+            )
+        next_link = ""
+        if start + self.page_size < self.businesses:
+            next_link = f'<a href="/{lang}/q/{city}/{query}?page={page + 1}"><button id="load-next-page">Next</button></a>'
+        else:
+            next_link = '<button id="load-next-page" disabled>Next</button>'
+        return self._html("".join(cards) + next_link)
+
+    def detail_page(self, city, business):
+        n = int(business.rsplit("-", 1)[-1])
+        email = ""
+        if not (self.no_email_every and n % self.no_email_every == 0):
+            email = f'<a data-testid="contact-link" href="mailto:info@{business}.ch">info@{business}.ch</a>'
+        return self._html(
+            f"<h1>Business {business}</h1>"
+            f"<div data-cy='detail-map-preview'><span>Bahnhofstrasse&nbsp;{n}</span><span class='sh'>Map</span>"
+            f"<span>3000 {city.rsplit('-', 1)[0].title()}</span></div>"
+            f"<div data-testid='ratings-section'><span data-testid='average-rating'>4.{n % 10}</span></div>"
+            f"<div class='teaser'><span data-testid='average-rating'>1.0</span></div>"
+            f"{email}"
+        )
+
+    def page(self, path, query=""):
+        """Return the HTML for a path, or None for a 404."""
+        page = int(parse_qs(query).get("page", ["1"])[0])
+        parts = [p for p in path.split("/") if p]
+
+        if parts == ["en", "categories"]:
+            return self.categories_page()
+        if len(parts) == 3 and parts[:2] == ["en", "categories"] and parts[2].upper() in self.letters:
+            return self.letter_page(parts[2].upper())
+        if len(parts) >= 4 and parts[0] in LANG_PATHS and parts[1] == LANG_PATHS[parts[0]]:
+            slug = parts[3]
+            if not re.fullmatch(r"[a-z]category\d+", slug):
+                return None
+            if len(parts) == 4:
+                return self.category_page(parts[0], slug)
+            if len(parts) == 5 and parts[4] in self.subletters:
+                return self.city_list_page(parts[0], slug, parts[4])
+        if len(parts) == 4 and parts[1] == "q":
+            return self.listing_page(parts[0], parts[2], parts[3], page)
+        if len(parts) == 4 and parts[1] == "d":
+            return self.detail_page(parts[2], parts[3])
+        return None
+
+    # -------------------- SERVER --------------------
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                html = site.page(parts.path, parts.query)
+                if html is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = html.encode("utf-8")
+                gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+                if gzipped:
+                    body = gzip.compress(body, compresslevel=5)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Start the server on a daemon thread; returns (server, base_url)."""
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="fixture-site", daemon=True).start()
+        return server, f"http://{host}:{server.server_port}"
+
+    def dump(self, directory):
+        """Write one page of each kind to `directory`, e.g. as saved-HTML samples."""
+        os.makedirs(directory, exist_ok=True)
+        letter = self.letters[0]
+        slug = self.category_slugs(letter)[0]
+        samples = {
+            "categories.html": self.categories_page(),
+            "letter.html": self.letter_page(letter),
+            "category.html": self.category_page("en", slug),
+            "city_list.html": self.city_list_page("en", slug, self.subletters[0]),
+            "listing.html": self.listing_page("en", "bern-0", f"{slug}-{self.subletters[0]}", 1),
+            "detail.html": self.detail_page("bern-0", self.business_id(slug, self.subletters[0], "bern-0", 1)),
+        }
+        for name, html in samples.items():
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(html)
+        return sorted(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the synthetic local.ch fixture site.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--letters", type=int, default=2)
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--cities", type=int, default=2)
+    parser.add_argument("--businesses", type=int, default=20, help="businesses per city")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--dump", help="write sample pages to this directory and exit")
+    args = parser.parse_args(argv)
+
+    site = FixtureSite(letters=args.letters, categories=args.categories, cities=args.cities,
+                       businesses=args.businesses, page_size=args.page_size)
+    if args.dump:
+        print("\n".join(site.dump(args.dump)))
+        return
+
+    server, base_url = site.serve(args.host, args.port)
+    print(f"Serving {site.total_businesses()} businesses at {base_url}/en/categories (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
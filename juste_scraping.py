@@ -1,8 +1,13 @@
-import re, sys, os, time, json, shutil, threading, smtplib
+import re, sys, os, csv, ssl, argparse, gzip, math, time, zlib, json, queue, random, itertools, collections, atexit, sqlite3, asyncio, hashlib, logging, threading, smtplib
+import http.client
+import logging.handlers
+
+from array import array
+from contextlib import contextmanager
 
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from openpyxl import load_workbook
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from openpyxl import Workbook, load_workbook
 from email.mime.text import MIMEText
 from datetime import datetime, timezone, timedelta
 
@@ -13,17 +18,2791 @@ from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, InvalidSessionIdException, NoSuchWindowException
+)
+
+
+# lxml is much faster than the pure-Python parser; fall back if it is missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Parquet export is optional
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+BASE_URL = "https://www.local.ch"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+# -------------------- LOGGING BACKEND --------------------
+class IstFormatter(logging.Formatter):
+    """'[YYYY-mm-dd HH:MM:SS] [W<i>] message' with the timestamp in IST."""
+
+    def format(self, record):
+        timestamp = datetime.fromtimestamp(record.created, IST).strftime("%Y-%m-%d %H:%M:%S")
+        worker = getattr(record, "worker", None)
+        worker_tag = f"[W{worker}] " if worker is not None else ""
+        return f"[{timestamp}] {worker_tag}{record.getMessage()}"
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record, for log shipping."""
+
+    def format(self, record):
+        return json.dumps({
+            "ts": datetime.fromtimestamp(record.created, IST).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "suffix": getattr(record, "suffix", "_log"),
+            "worker": getattr(record, "worker", None),
+            "message": record.getMessage(),
+        }, ensure_ascii=False)
+
+
+class SuffixFileHandler(logging.Handler):
+    """
+    Routes each record to logs/localch_live<suffix>_<run_id>.log (and the
+    worker's own file), keeping the files open instead of reopening them
+    per message. Buffers are flushed at most once a second, or right away
+    for warnings and errors.
+    """
+
+    def __init__(self, directory, run_id, extension="log", flush_interval=1.0):
+        super().__init__()
+        self.directory = directory
+        self.run_id = run_id
+        self.extension = extension
+        self.flush_interval = flush_interval
+        self._files = {}
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, name):
+        f = self._files.get(name)
+        if f is None:
+            path = os.path.join(self.directory, f"localch_live{name}_{self.run_id}.{self.extension}")
+            f = self._files[name] = open(path, "a", encoding="utf-8")
+        return f
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + "\n"
+            names = [getattr(record, "suffix", "_log")]
+            worker = getattr(record, "worker", None)
+            if worker is not None:
+                names.append(f"_worker{worker}")
+            for name in names:
+                self._file(name).write(line)
+
+            if record.levelno >= logging.WARNING or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        super().close()
+
+
+class LogBackend:
+    """
+    Queue-based logging: callers only enqueue a record, a single
+    QueueListener thread formats and writes to console and log files.
+    """
+
+    def __init__(self, run_id, level="INFO", json_lines=False, directory="logs", console=True):
+        self.queue = queue.Queue(-1)
+        self.logger = logging.getLogger(f"localch.{run_id}.{id(self)}")
+        self.logger.setLevel(level)
+        self.logger.propagate = False
+        self.logger.handlers[:] = [logging.handlers.QueueHandler(self.queue)]
+
+        file_handler = SuffixFileHandler(directory, run_id, extension="jsonl" if json_lines else "log")
+        file_handler.setFormatter(JsonLineFormatter() if json_lines else IstFormatter())
+        self.handlers = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(IstFormatter())
+            self.handlers.append(console_handler)
+
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def close(self):
+        """Drain the queue and close the files; safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.flush()
+            if isinstance(handler, SuffixFileHandler):
+                handler.close()
+
+
+# -------------------- RUN METRICS --------------------
+class RunMetrics:
+    """
+    Thread-safe stage timers and event counters. Timers are keyed by stage,
+    counters by name plus optional labels (letter, city, source, ...).
+    Exported as a Prometheus textfile and a JSON summary.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    @contextmanager
+    def time(self, stage, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start, **labels)
+
+    def observe(self, stage, seconds, **labels):
+        key = self._key(stage, labels)
+        with self._lock:
+            timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def incr(self, name, n=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def total(self, name):
+        with self._lock:
+            return sum(n for (counter, _), n in self.counters.items() if counter == name)
+
+    def _by_label(self, name, label):
+        out = {}
+        with self._lock:
+            for (counter, labels), n in self.counters.items():
+                value = dict(labels).get(label)
+                if counter == name and value is not None:
+                    out[value] = out.get(value, 0) + n
+        return out
+
+    def summary(self, extra=None):
+        elapsed_min = max((time.time() - self.started) / 60, 1e-9)
+        saved = self.total("businesses_saved")
+        without_email = self.total("businesses_without_email")
+        stages, labelled = {}, {}
+        with self._lock:
+            for (stage, labels), (count, total, longest) in self.timers.items():
+                if labels:
+                    # Label values joined in key order, e.g. "letter" -> {"A": 12.3}, "city" -> {"Bern/A": 4.5}
+                    labelled.setdefault(f"{stage}_seconds", {})["/".join(v for _, v in labels)] = round(total, 3)
+                    continue
+                stages[stage] = {"count": count, "total_s": round(total, 3),
+                                 "avg_s": round(total / count, 4) if count else 0.0, "max_s": round(longest, 3)}
+        summary = {
+            "started": datetime.fromtimestamp(self.started, IST).isoformat(timespec="seconds"),
+            "elapsed_min": round(elapsed_min, 2),
+            "pages": self.total("pages"),
+            "pages_per_min": round(self.total("pages") / elapsed_min, 2),
+            "businesses": saved,
+            "businesses_per_min": round(saved / elapsed_min, 2),
+            "email_hit_rate": round(saved / (saved + without_email), 4) if saved + without_email else None,
+            "errors": self.total("errors"),
+            "application_errors": self.total("application_errors"),
+            "refreshes": self.total("refreshes"),
+            "stages": stages,
+            "businesses_by_letter": self._by_label("businesses_saved", "letter"),
+            "businesses_by_city": self._by_label("businesses_saved", "city"),
+            **labelled,
+        }
+        if extra:
+            summary.update(extra)
+        return summary
+
+    @staticmethod
+    def _escape(value):
+        """Escape a label value for the Prometheus text format."""
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{RunMetrics._escape(v)}"' for k, v in labels) + "}"
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP localch_stage_seconds_total Time spent per scraper stage.",
+            "# TYPE localch_stage_seconds_total counter",
+        ]
+        with self._lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+        for (stage, labels), (count, total, _) in timers:
+            lines.append(f"localch_stage_seconds_total{self._labels((('stage', stage),) + labels)} {total:.6f}")
+        lines += [
+            "# HELP localch_stage_calls_total Calls per scraper stage.",
+            "# TYPE localch_stage_calls_total counter",
+        ]
+        for (stage, labels), (count, total, _) in timers:
+            lines.append(f"localch_stage_calls_total{self._labels((('stage', stage),) + labels)} {count}")
+        for name in sorted({name for (name, _), _ in counters}):
+            lines += [f"# TYPE localch_{name}_total counter"]
+            lines += [f"localch_{name}_total{self._labels(labels)} {n}" for (counter, labels), n in counters if counter == name]
+        lines.append(f"localch_run_start_timestamp_seconds {self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, run_id, extra=None):
+        """Write <directory>/localch_scraper.prom and <directory>/localch_metrics_<run_id>.json."""
+        os.makedirs(directory, exist_ok=True)
+        prom_path = os.path.join(directory, "localch_scraper.prom")
+        json_path = os.path.join(directory, f"localch_metrics_{run_id}.json")
+        for path, content in (
+            (prom_path, self.prometheus_text()),
+            (json_path, json.dumps(self.summary(extra), indent=2, ensure_ascii=False)),
+        ):
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        return prom_path, json_path
+
+
+# -------------------- SNAPSHOT SERVICE --------------------
+class SnapshotService:
+    """
+    One daemon thread that snapshots every registered output file (compacted
+    JSON and live .jsonl journals) on an interval into backup_json/Category_X. Snapshots are gzip-compressed,
+    skipped when the file has not changed since the last one (incremental),
+    and pruned to the newest `keep` per file.
+    """
+
+    def __init__(self, interval=600, keep=24, compress=True, log=print):
+        self.interval = interval
+        self.keep = keep
+        self.compress = compress
+        self.log = log
+        self._paths = set()
+        self._last_digest = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, json_file_path):
+        with self._lock:
+            if json_file_path in self._paths:
+                return
+            self._paths.add(json_file_path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="snapshot-service", daemon=True)
+                self._thread.start()
+        self.log(f"🕒 Snapshots every {self.interval // 60} minutes for {json_file_path}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot_all()
+
+    def stop(self, final_snapshot=True):
+        """Stop the thread; by default take one last snapshot of every output."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if final_snapshot:
+            self.snapshot_all()
+
+    def snapshot_all(self):
+        with self._lock:
+            paths = sorted(self._paths)
+        for path in paths:
+            try:
+                self.snapshot(path)
+            except Exception as e:
+                self.log(f"❌ Failed to create backup of {path}: {e}")
+
+    @staticmethod
+    def backup_dir_for(json_file_path):
+        name_without_ext = os.path.splitext(os.path.basename(json_file_path))[0]
+        # Extract suffix like "_a" or "_z" using regex
+        match = re.search(r"_([a-zA-Z])$", name_without_ext)
+        suffix = match.group(1).upper() if match else "Unknown"
+        return os.path.join(os.path.dirname(json_file_path), "backup_json", f"Category_{suffix}")
+
+    def snapshot(self, json_file_path):
+        """Snapshot one file; returns the backup path, or None if unchanged/missing."""
+        # Outputs are replaced atomically, so one read is a consistent copy
+        try:
+            with open(json_file_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        name_without_ext, ext = os.path.splitext(os.path.basename(json_file_path))
+        if ext == ".jsonl":
+            # Journals are appended to while we read: keep whole lines only
+            data = data[:data.rfind(b"\n") + 1]
+
+        digest = hashlib.sha256(data).hexdigest()
+        if self._last_digest.get(json_file_path) == digest:
+            return None
+
+        backup_dir = self.backup_dir_for(json_file_path)
+        os.makedirs(backup_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = f"{ext}.gz" if self.compress else ext
+        backup_file = os.path.join(backup_dir, f"{name_without_ext}_{timestamp}{extension}")
+        tmp_file = backup_file + ".tmp"
+        if self.compress:
+            with gzip.open(tmp_file, "wb", compresslevel=6) as f:
+                f.write(data)
+        else:
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+        os.replace(tmp_file, backup_file)
+
+        self._last_digest[json_file_path] = digest
+        self.log(f"✅ Backup created: {backup_file}")
+        self._prune(backup_dir, name_without_ext, ext)
+        return backup_file
+
+    def _prune(self, backup_dir, name_without_ext, ext=".json"):
+        if not self.keep:
+            return
+        # The journal and its compacted JSON share a name, so each keeps its own `keep` newest
+        pattern = re.compile(rf"^{re.escape(name_without_ext)}_\d{{8}}_\d{{6}}{re.escape(ext)}(\.gz)?$")
+        backups = sorted(name for name in os.listdir(backup_dir) if pattern.match(name))
+        for name in backups[:-self.keep]:
+            try:
+                os.remove(os.path.join(backup_dir, name))
+            except OSError:
+                pass
+
+
+# -------------------- CRAWL FRONTIER --------------------
+class CrawlFrontier:
+    """
+    SQLite-backed record of crawl progress, so a restarted run can skip work
+    that already finished. Each row is (kind, key) -> status + optional JSON
+    data; kinds used are letter, category, subletter, city, page and business.
+    """
+
+    DONE = "done"
+    IN_PROGRESS = "in_progress"
+    FAILED = "failed"
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, status TEXT NOT NULL,"
+            " data TEXT, updated_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+        )
+
+    def reset(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM frontier")
+
+    def mark(self, kind, key, status, data=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO frontier (kind, key, status, data, updated_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (kind, key) DO UPDATE SET"
+                " status = excluded.status, data = excluded.data, updated_at = excluded.updated_at",
+                (kind, key, status, json.dumps(data, ensure_ascii=False) if data is not None else None, time.time()),
+            )
+
+    def get(self, kind, key):
+        """Return (status, data) or (None, None) if the item was never seen."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, data FROM frontier WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    def is_done(self, kind, key):
+        return self.get(kind, key)[0] == self.DONE
+
+    def keys(self, kind, status, prefix=""):
+        """Keys of the `kind` items with `status`, limited to those starting with `prefix`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM frontier WHERE kind = ? AND status = ? AND substr(key, 1, ?) = ?",
+                (kind, status, len(prefix), prefix),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM frontier GROUP BY kind, status"
+            ).fetchall()
+        return {f"{kind}:{status}": n for kind, status, n in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -------------------- DEDUP INDEX --------------------
+def canonical_url(url):
+    """Detail URL without query string, fragment or trailing slash, host lower-cased."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter; memory depends only on capacity and error rate."""
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class BusinessIndex:
+    """
+    Global index of already extracted detail pages, keyed on canonical URL.
+    Bloom filters in memory answer most misses; the records themselves live
+    in SQLite so memory stays bounded however many businesses are seen.
+    """
+
+    def __init__(self, path, capacity=1_000_000, reset=False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS businesses (url TEXT PRIMARY KEY, email TEXT, record TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS businesses_email ON businesses (email)")
+        if reset:
+            self._conn.execute("DELETE FROM businesses")
+
+        self._urls = BloomFilter(capacity)
+        self._emails = BloomFilter(capacity)
+        for url, email in self._conn.execute("SELECT url, email FROM businesses"):
+            self._urls.add(url)
+            if email:
+                self._emails.add(email.lower())
+
+    def get(self, url):
+        """Return the stored record for a canonical URL, or None."""
+        if url not in self._urls:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM businesses WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def url_for_email(self, email):
+        """Canonical URL of a business already indexed with this email, or None."""
+        if not email or email.lower() not in self._emails:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM businesses WHERE email = ? LIMIT 1", (email.lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, url, record):
+        email = (record.get("email") or "").lower() or None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO businesses (url, email, record) VALUES (?, ?, ?)",
+                (url, email, json.dumps(record, ensure_ascii=False)),
+            )
+            self._urls.add(url)
+            if email:
+                self._emails.add(email)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -------------------- HTTP FETCHER --------------------
+class FetchError(Exception):
+    pass
+
+
+class TransientFetchError(FetchError):
+    """429, 5xx or a connection failure: worth retrying after a backoff."""
+
+
+def is_transient_status(status):
+    return status == 429 or status >= 500
+
+
+def decode_body(body, content_encoding, content_type):
+    """Undo gzip/deflate transfer compression and decode with the declared charset."""
+    content_encoding = (content_encoding or "").lower()
+    if content_encoding == "gzip":
+        body = gzip.decompress(body)
+    elif content_encoding == "deflate":
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+
+    match = re.search(r"charset=[\"']?([\w-]+)", content_type or "", re.I)
+    charset = match.group(1) if match else "utf-8"
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class HttpFetcher:
+    """
+    Browserless GET for server-rendered pages. Keeps one keep-alive
+    connection per host and thread, and accepts gzip/deflate bodies.
+    """
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, user_agent=USER_AGENT, timeout=15, max_redirects=5, governor=None, retries=2):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        # Paces requests per host and sees every outcome; transient failures are retried with backoff
+        self.governor = governor
+        self.retries = retries
+        self._local = threading.local()  # http.client connections are not thread-safe
+
+    def _connection(self, scheme, netloc, fresh=False):
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+        conn = pool.get((scheme, netloc))
+        if conn is not None and fresh:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conn_cls(netloc, timeout=self.timeout)
+            pool[(scheme, netloc)] = conn
+        return conn
+
+    def _request(self, url):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip, deflate",
+            "Accept-Language": "en",
+            "Connection": "keep-alive",
+        }
+
+        # A pooled socket may have been closed by the server: retry once on a fresh one
+        for fresh in (False, True):
+            conn = self._connection(parts.scheme, parts.netloc, fresh=fresh)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                return response, response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if fresh:
+                    raise
+
+    def get(self, url):
+        """Return (final_url, html) or raise FetchError."""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._get(url)
+            except TransientFetchError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+
+    def _get(self, url):
+        for _ in range(self.max_redirects + 1):
+            host = urlsplit(url).netloc
+            if self.governor is not None:
+                self.governor.acquire(host)
+            try:
+                response, body = self._request(url)
+            except (http.client.HTTPException, OSError) as e:
+                self._record(host, False)
+                raise TransientFetchError(f"{url}: {e}")
+
+            self._record(host, not is_transient_status(response.status))
+            location = response.getheader("Location")
+            if response.status in self.REDIRECT_CODES and location:
+                url = urljoin(url, location)
+                continue
+            if is_transient_status(response.status):
+                raise TransientFetchError(f"{url}: HTTP {response.status}")
+            if response.status >= 400:
+                raise FetchError(f"{url}: HTTP {response.status}")
+
+            return url, decode_body(body, response.getheader("Content-Encoding"), response.getheader("Content-Type"))
+
+        raise FetchError(f"{url}: too many redirects")
+
+    def _record(self, host, ok):
+        if self.governor is not None:
+            self.governor.record(host, ok)
+
+
+# -------------------- ASYNC HTTP FETCHER --------------------
+class AsyncHttpFetcher:
+    """
+    Minimal asyncio HTTP/1.1 GET client (keep-alive pool per host, gzip,
+    chunked bodies, redirects) so one event loop can keep many requests
+    in flight without a thread per request.
+    """
+
+    def __init__(self, user_agent=USER_AGENT, timeout=20, max_redirects=5):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+
+    async def _connect(self, scheme, netloc):
+        host, _, port = netloc.partition(":")
+        port = int(port) if port else (443 if scheme == "https" else 80)
+        secure = scheme == "https"
+        return await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=self._ssl if secure else None,
+                                    server_hostname=host if secure else None),
+            self.timeout,
+        )
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by peer")
+        status = int(status_line.split(b" ", 2)[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, body
+
+    async def _request(self, url):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            f"User-Agent: {self.user_agent}\r\n"
+            "Accept: text/html,application/xhtml+xml\r\n"
+            "Accept-Encoding: gzip, deflate\r\n"
+            "Accept-Language: en\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+
+        # A pooled connection may have been closed by the server: retry once on a fresh one
+        for fresh in (False, True):
+            idle = self._idle.get(key)
+            reader, writer = idle.pop() if idle and not fresh else await self._connect(*key)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, body = await asyncio.wait_for(self._read_response(reader), self.timeout)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                writer.close()
+                if fresh:
+                    raise
+                continue
+
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self._idle.setdefault(key, []).append((reader, writer))
+            return status, headers, body
+
+    async def get(self, url):
+        """Return (final_url, html) or raise FetchError."""
+        for _ in range(self.max_redirects + 1):
+            try:
+                status, headers, body = await self._request(url)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                raise TransientFetchError(f"{url}: {e!r}")
+
+            if status in HttpFetcher.REDIRECT_CODES and headers.get("location"):
+                url = urljoin(url, headers["location"])
+                continue
+            if is_transient_status(status):
+                raise TransientFetchError(f"{url}: HTTP {status}")
+            if status >= 400:
+                raise FetchError(f"{url}: HTTP {status}")
+            return url, decode_body(body, headers.get("content-encoding"), headers.get("content-type"))
+
+        raise FetchError(f"{url}: too many redirects")
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+# -------------------- REQUEST GOVERNOR --------------------
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with jitter: a random delay in [d/2, d], d = base * 2**attempt."""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class RequestGovernor:
+    """
+    Per-host pacing that adapts to how the site copes (AIMD). A host starts
+    at `initial_rate` (default: `max_rate`); every success adds `increase`
+    requests/sec up to `max_rate`, every error or application-error page
+    halves the rate down to `min_rate`. When the error share over the last
+    `window` seconds reaches `error_threshold`, the host's circuit opens
+    and acquire() holds every caller for a cooldown that doubles while the
+    site keeps failing. After the cooldown a single probe request goes out
+    while everyone else keeps waiting: its success closes the circuit
+    (pacing restarts from `min_rate`), its failure reopens it. A probe that
+    never reports back is given up after `probe_timeout` seconds.
+    Works for threads (acquire) and the event loop (acquire_async).
+    """
+
+    def __init__(self, initial_rate=None, min_rate=0.2, max_rate=10.0, increase=0.1, decrease=0.5,
+                 window=60.0, min_samples=10, error_threshold=0.5, cooldown=30.0, max_cooldown=600.0,
+                 probe_timeout=60.0, poll_interval=0.5, log=None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.min_samples = min_samples
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.poll_interval = poll_interval
+        self._log = log or (lambda msg: None)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {
+                "rate": min(self.initial_rate or self.max_rate, self.max_rate), "next_at": 0.0, "outcomes": collections.deque(),
+                "circuit": "closed", "open_until": 0.0, "cooldown": self.cooldown, "probe_at": 0.0,
+                "requests": 0, "errors": 0, "opened": 0, "waited": 0.0,
+            }
+        return state
+
+    def set_max_rate(self, max_rate):
+        with self._lock:
+            self.max_rate = max_rate
+            for state in self._hosts.values():
+                state["rate"] = min(state["rate"], max_rate)
+
+    def _reserve(self, host):
+        """
+        Return (delay, granted): with granted, the caller's slot starts after
+        `delay`; otherwise a probe is in flight and the caller should ask
+        again after `delay`.
+        """
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            if state["circuit"] == "half_open" and now - state["probe_at"] < self.probe_timeout:
+                state["waited"] += self.poll_interval
+                return self.poll_interval, False
+            start = max(now, state["next_at"])
+            if state["circuit"] in ("open", "half_open"):
+                # The first request after the cooldown is the probe that decides the circuit;
+                # callers it held go right after it closes, not a min_rate slot later
+                start = max(start, state["open_until"])
+                state["circuit"], state["probe_at"], state["next_at"] = "half_open", start, start
+            else:
+                state["next_at"] = start + 1.0 / state["rate"]
+            state["requests"] += 1
+            state["waited"] += start - now
+            return start - now, True
+
+    def acquire(self, host):
+        while True:
+            delay, granted = self._reserve(host)
+            if delay > 0:
+                time.sleep(delay)
+            if granted:
+                return
+
+    async def acquire_async(self, host):
+        while True:
+            delay, granted = self._reserve(host)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if granted:
+                return
+
+    def record(self, host, ok, kind="error"):
+        """Report the outcome of a request to `host`; kind labels failures (error / application_error)."""
+        message = None
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            outcomes = state["outcomes"]
+            outcomes.append((now, ok))
+            while outcomes and outcomes[0][0] < now - self.window:
+                outcomes.popleft()
+
+            if ok:
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+                if state["circuit"] == "half_open":
+                    state["circuit"], state["cooldown"] = "closed", self.cooldown
+                    message = f"✅ Circuit closed for {host}, resuming at {state['rate']:.1f} req/s"
+            else:
+                state["errors"] += 1
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+                errors = sum(1 for _, success in outcomes if not success)
+                tripped = len(outcomes) >= self.min_samples and errors / len(outcomes) >= self.error_threshold
+                if state["circuit"] == "half_open" or (state["circuit"] == "closed" and tripped):
+                    if state["circuit"] == "half_open":
+                        state["cooldown"] = min(self.max_cooldown, state["cooldown"] * 2)
+                    state["circuit"] = "open"
+                    state["open_until"] = now + state["cooldown"]
+                    state["rate"] = self.min_rate
+                    state["opened"] += 1
+                    outcomes.clear()
+                    message = (f"🛑 Circuit open for {host} after {errors} {kind}s — "
+                               f"pausing {state['cooldown']:.0f}s")
+        # Logged outside the lock: the log callback may block
+        if message:
+            self._log(message)
+
+    def backoff(self, attempt):
+        return backoff_delay(attempt)
+
+    def summary(self):
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state["rate"], 2), "circuit": state["circuit"], "requests": state["requests"],
+                    "errors": state["errors"], "circuit_opened": state["opened"], "waited_s": round(state["waited"], 1),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+# -------------------- CRAWL PLAN --------------------
+def parse_shard(value):
+    """"2/4" -> (2, 4); shards are numbered from 1."""
+    try:
+        index, count = (int(part) for part in str(value).split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {value!r}")
+    if count < 1:
+        raise ValueError(f"shard count must be at least 1, got {value!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def shard_for(key, count):
+    """Stable 1-based shard of a key; crc32 so every machine agrees on the split."""
+    return zlib.crc32(key.encode("utf-8")) % count + 1
+
+
+class CrawlPlan:
+    """
+    Which part of the A-Z tree to crawl, read from a workbook. Each row of
+    the "plan" sheet (or the first sheet) is a rule with the columns
+
+        letter | category | language | city | action | max_pages
+
+    Blank cells match anything; all filled cells of a row must match.
+    action is include, exclude or limit (the default is limit when
+    max_pages is set, include otherwise). When there are include rules, a
+    letter/category/city is crawled only if some include rule can match it,
+    and never if an exclude rule matches. A language on an include rule
+    crawls the category in that language; max_pages caps the listing pages
+    read per city. An empty or missing workbook means crawl everything; a
+    row with an unknown action or a bad max_pages is skipped with a warning.
+    """
+
+    FIELDS = ("letter", "category", "language", "city")
+    ACTIONS = ("include", "exclude", "limit")
+
+    def __init__(self, rules=None, source=None):
+        self.rules = rules or []
+        self.source = source
+
+    @classmethod
+    def load(cls, path, log=print):
+        """Stream the rules out of `path` with a read-only workbook."""
+        if not path or not os.path.exists(path):
+            return cls(source=path)
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook["plan"] if "plan" in workbook.sheetnames else workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(cell).strip().lower() if cell is not None else "" for cell in next(rows, ())]
+            rules = []
+            for number, row in enumerate(rows, start=2):
+                values = dict(zip(header, row))
+                rule = {field: cls._normalize(field, values.get(field)) for field in cls.FIELDS}
+                max_pages = values.get("max_pages")
+                try:
+                    rule["max_pages"] = int(max_pages) if max_pages not in (None, "") else None
+                except (TypeError, ValueError):
+                    # One bad cell costs its row, not the whole plan
+                    log(f"⚠️ Crawl plan row {number}: max_pages {max_pages!r} is not a number — row skipped")
+                    continue
+                action = str(values.get("action") or ("limit" if rule["max_pages"] else "include")).strip().lower()
+                rule["action"] = "exclude" if action.startswith("ex") or action in ("no", "skip") else action
+                if rule["action"] not in cls.ACTIONS:
+                    log(f"⚠️ Crawl plan row {number}: unknown action {action!r} — row skipped")
+                    continue
+                if any(rule[field] for field in cls.FIELDS) or rule["max_pages"]:
+                    rules.append(rule)
+        finally:
+            workbook.close()
+        return cls(rules, source=path)
+
+    @staticmethod
+    def _normalize(field, value):
+        if value is None or str(value).strip() == "":
+            return None
+        value = str(value).strip()
+        return value.upper() if field == "letter" else value.casefold()
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def _query(self, letter, category, language, city):
+        return {
+            "letter": self._normalize("letter", letter),
+            "category": self._normalize("category", category),
+            "language": self._normalize("language", language),
+            "city": self._normalize("city", city),
+        }
+
+    @staticmethod
+    def _compatible(rule, query):
+        """The rule matches every field the query specifies."""
+        return all(rule[f] is None or query[f] is None or rule[f] == query[f] for f in CrawlPlan.FIELDS)
+
+    @staticmethod
+    def _covers(rule, query):
+        """Every field the rule specifies is given by the query and matches."""
+        return all(rule[f] is None or rule[f] == query[f] for f in CrawlPlan.FIELDS)
+
+    def allows(self, letter, category=None, language=None, city=None):
+        if not self.rules:
+            return True
+        query = self._query(letter, category, language, city)
+        includes = [r for r in self.rules if r["action"] == "include" and any(r[f] for f in self.FIELDS)]
+        if includes and not any(self._compatible(r, query) for r in includes):
+            return False
+        return not any(r["action"] == "exclude" and self._covers(r, query) for r in self.rules)
+
+    def languages_for(self, letter, category, default):
+        """Languages to crawl a category in; `default` unless include rules name others."""
+        query = self._query(letter, category, None, None)
+        languages = []
+        for rule in self.rules:
+            if rule["action"] != "include" or not self._compatible(rule, query):
+                continue
+            language = rule["language"] or default
+            if language not in languages:
+                languages.append(language)
+        if not languages:
+            languages = [default]
+        return [lang for lang in languages if self.allows(letter, category, lang)]
+
+    def max_pages(self, letter, category, language, city):
+        """Listing pages to read for one city, or None for no limit."""
+        query = self._query(letter, category, language, city)
+        limits = [r["max_pages"] for r in self.rules if r["max_pages"] and r["action"] != "exclude" and self._covers(r, query)]
+        return min(limits) if limits else None
+
+    def summary(self):
+        counts = {}
+        for rule in self.rules:
+            counts[rule["action"]] = counts.get(rule["action"], 0) + 1
+        return f"{counts} rules from {self.source}"
+
+
+# -------------------- PAGE ARCHIVE --------------------
+class PageArchive:
+    """
+    Content-addressed store of raw fetched HTML. Each distinct page body is
+    gzipped once under objects/<sha[:2]>/<sha>.html.gz; a SQLite index maps
+    (url, fetched_at) to the body hash, so re-fetching an unchanged page costs
+    one index row. get() has the same shape as HttpFetcher.get and returns
+    the most recent capture of a URL, which is what replay mode reads from.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT NOT NULL, fetched_at REAL NOT NULL, final_url TEXT NOT NULL,"
+            " sha256 TEXT NOT NULL, source TEXT, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)")
+
+    @staticmethod
+    def key(url):
+        """Like canonical_url, but the query string is kept (listing pages differ only by ?page=)."""
+        parts = urlsplit(url.strip())
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", parts.query, ""))
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.html.gz")
+
+    def store(self, url, html, final_url=None, source=None):
+        """Archive one fetch of `url`; returns the content hash."""
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(body, compresslevel=6))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (url, fetched_at, final_url, sha256, source, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(url), time.time(), final_url or url, digest, source, len(body)),
+            )
+        return digest
+
+    def get(self, url):
+        """Return (final_url, html) of the latest capture of `url`; FetchError if it was never archived."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, sha256 FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (self.key(url),),
+            ).fetchone()
+        if row is None:
+            raise FetchError(f"{url} not in archive")
+        try:
+            with open(self._object_path(row[1]), "rb") as f:
+                return row[0], gzip.decompress(f.read()).decode("utf-8")
+        except OSError as e:
+            raise FetchError(f"archived body for {url} unreadable: {e}")
+
+    def counts(self):
+        with self._lock:
+            pages, urls, objects, size = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT sha256), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        return {"captures": pages, "urls": urls, "objects": objects, "bytes_raw": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayDriver:
+    """
+    Stand-in for the Edge driver in replay mode. Navigation serves pages from
+    a PageArchive and page_source/current_url reflect them; there is no live
+    DOM, so element lookups find nothing and scripts are no-ops. Extraction
+    works because it parses page_source with the same parse_* functions.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.current_url = "about:blank"
+        self.page_source = "<html><body></body></html>"
+        self._history = []
+
+    def get(self, url):
+        self.current_url, self.page_source = self.archive.get(url)
+        self._history.append(url)
+
+    def refresh(self):
+        if self._history:
+            self.get(self._history[-1])
+
+    def back(self):
+        if len(self._history) > 1:
+            self._history.pop()
+            self.get(self._history.pop())
+
+    def find_element(self, by=None, value=None):
+        raise NoSuchElementException(f"replay mode has no DOM: {value}")
+
+    def find_elements(self, by=None, value=None):
+        return []
+
+    def execute_script(self, script, *args):
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get_log(self, log_type):
+        return []
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def quit(self):
+        pass
+
+
+# -------------------- RESOURCE BLOCKING --------------------
+ASSET_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+]
+TRACKER_PATTERNS = [
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*", "*criteo.*",
+    "*bing.com/bat*", "*cookielaw.org*", "*onetrust.com*", "*optimizely.com*",
+    "*sentry.io*", "*newrelic.com*", "*nr-data.net*",
+]
+BLOCKING_PROFILES = {
+    "off": [],
+    "assets": ASSET_PATTERNS,
+    "strict": ASSET_PATTERNS + TRACKER_PATTERNS,
+}
+# Rough transfer size of a request we never made, per CDP resource type
+ESTIMATED_BYTES = {"Image": 30_000, "Font": 40_000, "Media": 300_000, "Script": 60_000, "Stylesheet": 20_000}
+
+
+class ResourceBlocker:
+    """
+    Keeps the browser to the DOM text: content-setting prefs switch off
+    images/notifications, CDP Network.setBlockedURLs drops fonts, media and
+    tracker/consent scripts. Network events from the performance log are
+    tallied into blocked-request and transferred-byte counters.
+    """
+
+    def __init__(self, profile="strict"):
+        self.profile = profile
+        self.patterns = BLOCKING_PROFILES[profile]
+        self.stats = {"requests": 0, "blocked": 0, "bytes_transferred": 0, "bytes_saved_est": 0, "blocked_by_type": {}}
+        self._lock = threading.Lock()
+
+    def apply_options(self, options):
+        if self.profile == "off":
+            return
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.notifications": 2,
+            "profile.managed_default_content_settings.geolocation": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+        options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
+        # Only the Network domain feeds the counters; Page and timeline events would just pile up until collect()
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    def attach(self, driver):
+        if not self.patterns:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+
+    def collect(self, driver):
+        """Drain the performance log into the counters."""
+        if self.profile == "off":
+            return
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return
+
+        types = {}
+        with self._lock:
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError):
+                    continue
+                method, params = message.get("method"), message.get("params", {})
+                if method == "Network.requestWillBeSent":
+                    self.stats["requests"] += 1
+                    types[params.get("requestId")] = params.get("type", "Other")
+                elif method == "Network.loadingFinished":
+                    self.stats["bytes_transferred"] += int(params.get("encodedDataLength", 0))
+                elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                    kind = params.get("type") or types.get(params.get("requestId"), "Other")
+                    self.stats["blocked"] += 1
+                    self.stats["blocked_by_type"][kind] = self.stats["blocked_by_type"].get(kind, 0) + 1
+                    self.stats["bytes_saved_est"] += ESTIMATED_BYTES.get(kind, 10_000)
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, blocked_by_type=dict(self.stats["blocked_by_type"]))
+
+
+# -------------------- WAIT POLICY --------------------
+def page_ready(driver):
+    """
+    The DOM is parsed (readyState interactive or complete) and a <body>
+    exists. Waiting for 'complete' would also wait for images and other
+    subresources, which is what the eager page load strategy skips.
+    """
+    try:
+        return driver.execute_script("return document.readyState !== 'loading' && !!document.body")
+    except Exception:
+        return False
+
+
+def page_recovered(driver):
+    """DOM parsed again after a refresh and no longer showing the application error screen."""
+    try:
+        return driver.execute_script(
+            "if (document.readyState === 'loading' || !document.body) return false;"
+            "const t = document.documentElement.innerHTML.toLowerCase();"
+            "return !t.includes('application error') && !t.includes('client-side exception');"
+        )
+    except Exception:
+        return False
+
+
+def detail_content_ready(driver):
+    """Detail page has rendered its address block or a contact link."""
+    return driver.find_elements(
+        By.CSS_SELECTOR, "div[data-cy='detail-map-preview'], a[data-testid='contact-link']"
+    ) or False
+
+
+class WaitPolicy:
+    """
+    Central condition-based waits. Every wait has a name with a configurable
+    timeout, and records how long it took and whether it timed out.
+    """
+
+    DEFAULT_TIMEOUTS = {
+        "body": 6,
+        "h1": 6,
+        "detail_content": 6,
+        "listing": 6,
+        "clickable": 5,
+        "cookie": 2,
+        "language_menu": 8,
+        "heading_change": 8,
+        "refresh": 10,
+    }
+
+    def __init__(self, timeouts=None, poll_frequency=0.1):
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.poll_frequency = poll_frequency
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def until(self, driver, name, condition, timeout=None, raise_on_timeout=False):
+        """Wait for `condition`; return its value, or None on timeout unless `raise_on_timeout`."""
+        timeout = self.timeouts.get(name, 6) if timeout is None else timeout
+        start = time.monotonic()
+        timed_out = False
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+        except TimeoutException:
+            timed_out = True
+            if raise_on_timeout:
+                raise
+            return None
+        finally:
+            self._record(name, time.monotonic() - start, timed_out)
+
+    def _record(self, name, elapsed, timed_out):
+        with self._lock:
+            stat = self.stats.setdefault(name, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0})
+            stat["count"] += 1
+            stat["timeouts"] += int(timed_out)
+            stat["total"] += elapsed
+            stat["max"] = max(stat["max"], elapsed)
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": stat["count"],
+                    "timeouts": stat["timeouts"],
+                    "avg_s": round(stat["total"] / stat["count"], 3) if stat["count"] else 0.0,
+                    "max_s": round(stat["max"], 3),
+                    "total_s": round(stat["total"], 3),
+                }
+                for name, stat in sorted(self.stats.items())
+            }
+
+
+# -------------------- DRIVER MANAGER --------------------
+SESSION_CRASH_RE = re.compile(
+    r"invalid session id|session deleted|disconnected|not reachable|tab crashed|target window already closed"
+    r"|Max retries exceeded|Connection refused|Connection aborted",
+    re.IGNORECASE,
+)
+
+
+def is_session_crash(exc):
+    """True if `exc` means the browser session is gone (as opposed to a page-level failure)."""
+    if isinstance(exc, FetchError):
+        return False  # plain HTTP failures say nothing about the browser
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)):
+        return True
+    return bool(SESSION_CRASH_RE.search(str(exc)))
+
+
+class DriverManager:
+    """
+    Owns one WebDriver session. The session is started lazily and counts
+    the pages it loads; at safe points between tasks (maintain()) it is
+    recycled after `max_pages` pages, or earlier when a health check finds
+    it unresponsive or its renderer's JS heap above `max_memory_mb`.
+    handle_crash() drops a dead session so the next access starts a new
+    one and the caller can re-run the task that was in flight.
+    """
+
+    HEALTH_JS = "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : -1;"
+
+    def __init__(self, factory, retire=None, log=None, metrics=None,
+                 max_pages=500, max_memory_mb=1024, check_every=25, max_latency=10.0):
+        self._factory = factory
+        self._retire = retire
+        self._log = log or (lambda msg: None)
+        self._metrics = metrics
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.check_every = check_every
+        self.max_latency = max_latency
+        self._driver = None
+        self.pages = 0
+        self._checked_at = 0
+        self.stats = {"sessions": 0, "recycled": 0, "respawned": 0}
+
+    @property
+    def current(self):
+        """The live session, or None; never starts one."""
+        return self._driver
+
+    def get(self):
+        if self._driver is None:
+            self._driver = self._factory()
+            self.pages = self._checked_at = 0
+            self.stats["sessions"] += 1
+        return self._driver
+
+    def page_loaded(self, n=1):
+        self.pages += n
+
+    def check(self):
+        """Round-trip a tiny script: responsiveness, and the renderer's JS heap where the browser exposes it."""
+        started = time.monotonic()
+        try:
+            heap = self._driver.execute_script(self.HEALTH_JS)
+        except Exception as e:
+            return {"responsive": False, "error": str(e).splitlines()[0] if str(e) else repr(e)}
+        latency = time.monotonic() - started
+        memory_mb = round(heap / 1e6, 1) if isinstance(heap, (int, float)) and heap >= 0 else None
+        return {"responsive": latency <= self.max_latency, "latency_s": round(latency, 2), "memory_mb": memory_mb}
+
+    def maintain(self):
+        """Call between tasks: recycle the session when it is due, unresponsive or too big."""
+        if self._driver is None:
+            return
+        reason = None
+        if self.max_pages and self.pages >= self.max_pages:
+            reason = "page budget reached"
+        elif self.check_every and self.pages - self._checked_at >= self.check_every:
+            self._checked_at = self.pages
+            health = self.check()
+            if not health["responsive"]:
+                reason = f"unresponsive {health}"
+            elif self.max_memory_mb and (health["memory_mb"] or 0) > self.max_memory_mb:
+                reason = f"renderer heap {health['memory_mb']} MB > {self.max_memory_mb} MB"
+        if reason:
+            self._log(f"♻️ Recycling browser session after {self.pages} pages: {reason}")
+            self.stats["recycled"] += 1
+            if self._metrics is not None:
+                self._metrics.incr("driver_recycles")
+            self.quit()
+
+    def handle_crash(self, exc):
+        """Drop the session if `exc` means it died; returns True when the task is worth re-running."""
+        if self._driver is None or not is_session_crash(exc):
+            return False
+        self._log(f"💥 Browser session died after {self.pages} pages ({exc.__class__.__name__}) → starting a new one")
+        self.stats["respawned"] += 1
+        if self._metrics is not None:
+            self._metrics.incr("driver_respawns")
+        self.quit()
+        return True
+
+    def quit(self):
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+        if self._retire is not None:
+            self._retire(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+# -------------------- DISCOVERY PARSERS --------------------
+def parse_category_letters(html, page_url):
+    """A-Z letter links below the 'Categories from A-Z' heading."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    letter_links = []
+
+    # Find heading first
+    heading = soup.find("h2", string=re.compile(r"Categories from A-Z", re.I))
+    if heading:
+        container = heading.find_next_sibling("div")
+        if container:
+            for a in container.find_all("a", href=True):
+                text = a.get_text(strip=True).upper()
+                if text.isalpha():  # only A-Z
+                    letter_links.append({"letter": text, "url": urljoin(page_url, a["href"])})
+    return letter_links
+
+
+def parse_categories(html, page_url):
+    """Category links of a letter page, as {"name", "slug", "language", "url"}."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    categories = []
+
+    # Dynamically find the div containing categories
+    container = soup.find("div", {"class": re.compile(r"c\d+")})
+    if container:
+        for a in container.find_all("a", href=True):
+            name = a.get_text(strip=True)
+            href = a["href"]
+            # Only process real category links
+            if href and href != "/en":
+                slug = href.rstrip("/").split("/")[-1]
+                categories.append({"name": name, "slug": slug, "language": "en", "url": urljoin(page_url, href)})
+    return categories
+
+
+def parse_subletters(html):
+    """Single-letter links (a-z) present on a category page."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    letters = set()
+    for a in soup.find_all("a", href=True):
+        text = a.get_text(strip=True).lower()
+        if len(text) == 1 and text.isalpha():
+            letters.add(text)
+    return sorted(letters)
+
+
+def parse_category_heading(html, page_url):
+    """
+    The <h1> of a category page plus its hreflang alternates.
+    Returns {"heading": str, "alternates": {lang: url}} or None without an h1.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    h1 = soup.find("h1")
+    if h1 is None or not h1.get_text(strip=True):
+        return None
+
+    alternates = {}
+    for link in soup.find_all("link", href=True, hreflang=True):
+        if "alternate" in (link.get("rel") or []):
+            lang = link["hreflang"].split("-")[0].lower()
+            alternates.setdefault(lang, urljoin(page_url, link["href"]))
+    return {"heading": h1.get_text(" ", strip=True), "alternates": alternates}
+
+
+def parse_cities(html, page_url):
+    """City links of a category/letter page, as {"name", "url"}."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    # Anchors whose own text reads "... in <City>", else the cC city container
+    city_anchors = [
+        a for a in soup.find_all("a", href=True)
+        if any("in " in s for s in a.find_all(string=True, recursive=False))
+    ]
+    if not city_anchors:
+        city_anchors = soup.select("div[class*='cC'] a[href]")
+
+    cities = []
+    for a in city_anchors:
+        text = a.get_text(" ", strip=True)
+        href = a.get("href")
+        if href and text:
+            city_name = text.split("in ")[-1] if "in " in text else text.split(".")[-1].strip()
+            cities.append({"name": city_name, "url": urljoin(page_url, href)})
+    return cities
+
+
+# -------------------- DOM EXTRACTION --------------------
+# Browser-side twins of parse_listing_page / parse_detail_page: one
+# execute_script round trip returns every field as a small JSON payload,
+# instead of shipping the whole page_source back to be parsed.
+_DOM_HELPERS = """
+const clean = el => el ? el.textContent.replace(/\\s+/g, ' ').trim() || null : null;
+const cardTitle = card => card.querySelector("h2[data-testid='title']")
+    || Array.from(card.querySelectorAll('h2')).find(h => /lk/.test(h.className));
+const pageError = () => {
+    const t = document.documentElement.innerHTML.toLowerCase();
+    return t.includes('application error') || t.includes('client-side exception');
+};
+"""
+
+LISTING_EXTRACT_JS = _DOM_HELPERS + """
+const detailUrls = [];
+for (const card of document.querySelectorAll("article[data-testid*='list-element-desktop']")) {
+    const title = cardTitle(card);
+    let anchor = title ? (title.closest('a[href]') || title.querySelector('a[href]')) : null;
+    anchor = anchor || card.querySelector('a[href]');
+    if (anchor && !detailUrls.includes(anchor.href)) detailUrls.push(anchor.href);
+}
+const button = document.querySelector('button#load-next-page');
+const next = button && !button.hasAttribute('disabled') ? button.closest('a[href]') : null;
+return {detail_urls: detailUrls, next_url: next ? next.href : null, error: pageError()};
+"""
+
+DETAIL_EXTRACT_JS = _DOM_HELPERS + """
+const mail = Array.from(document.querySelectorAll("a[data-testid='contact-link']"))
+    .find(a => (a.getAttribute('href') || '').startsWith('mailto:'));
+const map = document.querySelector("div[data-cy='detail-map-preview']");
+const parts = map ? Array.from(map.querySelectorAll('span'))
+    .filter(span => span.className.trim() !== 'sh').map(clean).filter(Boolean) : [];
+return {
+    title: clean(document.querySelector('h1')),
+    address: parts.length ? parts.join(', ') : null,
+    rating: clean(document.querySelector("div[data-testid='ratings-section'] span[data-testid='average-rating']")),
+    email: clean(mail),
+    url: location.href,
+    error: pageError(),
+};
+"""
+
+CLICK_CARD_JS = _DOM_HELPERS + """
+const card = document.querySelectorAll("article[data-testid*='list-element-desktop']")[arguments[0]];
+const title = card ? cardTitle(card) : null;
+if (!title) return false;
+title.scrollIntoView({block: 'center'});
+title.click();
+return true;
+"""
+
+
+# -------------------- JOURNAL --------------------
+class JsonlJournal:
+    """
+    Append-only JSON Lines journal fed through a queue and written by a
+    single background thread. Lines are fsync'ed in batches: every
+    `flush_every` records or `flush_interval` seconds, whichever comes first.
+    Callbacks queued with after_sync() run on the writer thread once every
+    record appended before them is on disk.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path, truncate=False, flush_every=50, flush_interval=2.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w" if truncate else "a", encoding="utf-8")
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._writer, name=f"journal-{os.path.basename(path)}", daemon=True
+        )
+        self._thread.start()
+
+    def append(self, record):
+        self._queue.put(record)
+
+    def after_sync(self, callback):
+        """Run `callback` once every record appended so far has been fsync'ed."""
+        self._queue.put(callback)
+
+    def flush(self):
+        """Block until every record appended so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        if not self._file.closed:
+            self._file.close()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @staticmethod
+    def _run_callbacks(callbacks):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        callbacks.clear()
+
+    def _writer(self):
+        pending = 0
+        waiting = []  # after_sync callbacks blocked on records not yet fsync'ed
+        last_sync = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._sync()
+                self._run_callbacks(waiting)
+                return
+            if isinstance(item, threading.Event):
+                self._sync()
+                pending, last_sync = 0, time.monotonic()
+                self._run_callbacks(waiting)
+                item.set()
+                continue
+            if callable(item):
+                waiting.append(item)
+                if not pending:
+                    self._run_callbacks(waiting)
+            elif item is not None:
+                self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+                pending += 1
+
+            if pending and (pending >= self.flush_every or time.monotonic() - last_sync >= self.flush_interval):
+                self._sync()
+                pending, last_sync = 0, time.monotonic()
+                self._run_callbacks(waiting)
+
+    @staticmethod
+    def scan(path):
+        """Yield (offset, record) for every intact line; read_at() re-reads a record from its offset."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                start, offset = offset, offset + len(line)
+                try:
+                    yield start, json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def read_at(f, offset):
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    @staticmethod
+    def read(path):
+        """Yield records from a journal, ignoring a torn last line after a crash."""
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+# -------------------- STREAMING EXPORT --------------------
+EXPORT_COLUMNS = [
+    "letter", "category", "language", "city", "title", "address", "rating", "email", "url",
+    "name_en", "name_de", "name_fr", "name_it",
+]
+
+
+class CsvExporter:
+    """One CSV row per professional, written as it arrives."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetExporter:
+    """Parquet file written in row groups of `batch_size`; needs pyarrow."""
+
+    def __init__(self, path, batch_size=5000):
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is not installed")
+        self.path = path
+        self.batch_size = batch_size
+        self._schema = pyarrow.schema([(name, pyarrow.string()) for name in EXPORT_COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+        self._rows = []
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        columns = [[None if row[i] is None else str(row[i]) for row in self._rows] for i in range(len(EXPORT_COLUMNS))]
+        self._writer.write_table(pyarrow.Table.from_arrays(columns, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+
+class XlsxExporter:
+    """openpyxl write-only workbook: rows are streamed out, not kept as cells."""
+
+    def __init__(self, path):
+        self.path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("professionals")
+        self._sheet.append(EXPORT_COLUMNS)
+
+    def write(self, row):
+        self._sheet.append(row)
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.save(self.path)
+            self._workbook = None
+
+
+EXPORTERS = {"csv": CsvExporter, "parquet": ParquetExporter, "xlsx": XlsxExporter}
+
+
+class StreamingExporter:
+    """
+    Flat one-row-per-professional exports fed from _save_category and
+    _save_business as the crawl runs. Only category translations are kept
+    in memory, so exporting a full crawl uses constant memory.
+    """
+
+    def __init__(self, directory, run_id, formats, log=None):
+        self.directory = directory
+        self._log = log or (lambda msg: None)
+        self._lock = threading.Lock()
+        self._translations = {}
+        self.rows = 0
+        self.exporters = []
+        os.makedirs(directory, exist_ok=True)
+        for fmt in formats:
+            try:
+                self.exporters.append(EXPORTERS[fmt](os.path.join(directory, f"localch_{run_id}.{fmt}")))
+            except Exception as e:
+                self._log(f"⚠️ {fmt} export disabled: {e}")
+
+    def category(self, category_name, translations):
+        with self._lock:
+            self._translations[category_name] = translations or {}
+
+    def business(self, column, category_name, language, city, business_data):
+        with self._lock:
+            translations = self._translations.get(category_name, {})
+            row = [
+                column, category_name, language, city,
+                business_data.get("title"), business_data.get("address"), business_data.get("rating"),
+                business_data.get("email"), business_data.get("url"),
+                translations.get("name_en"), translations.get("name_de"),
+                translations.get("name_fr"), translations.get("name_it"),
+            ]
+            for exporter in self.exporters:
+                exporter.write(row)
+            self.rows += 1
+
+    def replay_journal(self, path):
+        """Feed an existing journal through the exporters (used when resuming)."""
+        for record in JsonlJournal.read(path):
+            if record.get("type") == "category":
+                self.category(record["category"], record.get("translations"))
+            elif record.get("type") == "business":
+                self.business(record["column"], record["category"], record.get("language"),
+                              record["city"], record["business"])
+
+    def close(self):
+        """Finish every file and return their paths."""
+        paths = []
+        with self._lock:
+            for exporter in self.exporters:
+                try:
+                    exporter.close()
+                    paths.append(exporter.path)
+                except Exception as e:
+                    self._log(f"⚠️ Failed to finish {exporter.path}: {e}")
+            self.exporters = []
+        return paths
+
+
+# -------------------- CATEGORY TALLY --------------------
+class CategoryTally:
+    """
+    Cities and businesses saved so far for each category still being
+    crawled, for the progress logs. The businesses themselves only live in
+    the journals, so memory does not grow with the crawl; a category's
+    counters are released once it is finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (column, category, language) -> {"cities": {city, ...}, "businesses": int}
+        self._categories = {}
+        self.businesses = 0
+        self.released = 0
+
+    def _entry(self, column, category_name, language):
+        return self._categories.setdefault((column, category_name, language), {"cities": set(), "businesses": 0})
+
+    def add_category(self, column, category_name, language):
+        with self._lock:
+            self._entry(column, category_name, language)
+
+    def add_business(self, column, category_name, language, city):
+        with self._lock:
+            entry = self._entry(column, category_name, language)
+            entry["cities"].add(city)
+            entry["businesses"] += 1
+            self.businesses += 1
+
+    def counts(self, column, category_name, language):
+        """(cities, businesses) saved for a category."""
+        with self._lock:
+            entry = self._categories.get((column, category_name, language))
+            if entry is None:
+                return 0, 0
+            return len(entry["cities"]), entry["businesses"]
+
+    def release(self, column, category_name=None, language=None):
+        """Drop the counters of a finished category (or a whole letter)."""
+        with self._lock:
+            keys = [
+                key for key in self._categories
+                if key[0] == column and (category_name is None or key[1] == category_name)
+                and (language is None or key[2] == language)
+            ]
+            for key in keys:
+                del self._categories[key]
+            self.released += len(keys)
+
+    def summary(self):
+        with self._lock:
+            return {"in_progress": len(self._categories), "released": self.released, "businesses": self.businesses}
+
+
+# -------------------- STREAMING JSON --------------------
+_JSON_TOKEN = re.compile(r'\s*(?:([{}\[\]:,])|(")|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|(true|false|null))')
+_JSON_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_JSON_LITERALS = {"true": True, "false": False, "null": None}
+_JSON_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+def iter_json_events(f, chunk_size=1 << 16):
+    """
+    Incremental JSON tokenizer over a text file: yields (event, value) with
+    events start_map/end_map/start_array/end_array/key/value. Only one chunk
+    plus the current token is held in memory.
+    """
+    buf, pos, eof = "", 0, False
+    stack, expect_key = [], False
+    while True:
+        if not eof and len(buf) - pos < 1024:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        match = _JSON_TOKEN.match(buf, pos)
+        if match is None:
+            if buf[pos:].strip() == "" and eof:
+                return
+            if not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            raise ValueError(f"invalid JSON near {buf[pos:pos + 40]!r}")
+
+        punct, quote, number, literal = match.groups()
+        if quote:
+            string = _JSON_STRING.match(buf, match.end() - 1)
+            if string is None:
+                if eof:
+                    raise ValueError("unterminated JSON string")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            pos = string.end()
+            value = json.loads(string.group())
+            if expect_key:
+                expect_key = False
+                yield "key", value
+            else:
+                yield "value", value
+            continue
+        if number and not eof and (match.end() == len(buf) or buf[match.end()] in _JSON_NUMBER_CHARS):
+            # The number may continue in the next chunk ("1" of "1.5", "2e" of "2e10")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        pos = match.end()
+        if number:
+            yield "value", float(number) if any(c in number for c in ".eE") else int(number)
+        elif literal:
+            yield "value", _JSON_LITERALS[literal]
+        elif punct == "{":
+            stack.append("map")
+            expect_key = True
+            yield "start_map", None
+        elif punct == "[":
+            stack.append("array")
+            yield "start_array", None
+        elif punct in "}]":
+            stack.pop()
+            expect_key = False
+            yield ("end_map" if punct == "}" else "end_array"), None
+        elif punct == ",":
+            expect_key = bool(stack) and stack[-1] == "map"
+
+
+def _json_value(events, first):
+    """Build the complete value that starts with event `first`."""
+    event, value = first
+    if event == "value":
+        return value
+    if event == "start_map":
+        obj = {}
+        for event, key in events:
+            if event == "end_map":
+                return obj
+            obj[key] = _json_value(events, next(events))
+    if event == "start_array":
+        items = []
+        for item in events:
+            if item[0] == "end_array":
+                return items
+            items.append(_json_value(events, item))
+    raise ValueError(f"unexpected JSON event {event}")
+
+
+def category_slug(category_name):
+    """Slug used in the JSON outputs (same rule as save_to_json)."""
+    return (category_name or "").lower().replace(" ", "-")
+
+
+def _iter_output_json(events):
+    """Journal-style records from a save_to_json document, one professional at a time."""
+    if next(events, (None,))[0] != "start_map":
+        return
+    for event, key in events:
+        if event == "end_map":
+            return
+        if key != "categories":
+            _json_value(events, next(events))
+            continue
+        next(events)  # start_array
+        for event, _ in events:
+            if event == "end_array":
+                break
+            meta = {}
+            for event, key in events:
+                if event == "end_map":
+                    break
+                if key != "cities":
+                    meta[key] = _json_value(events, next(events))
+                    continue
+                next(events)  # start_array
+                for event, _ in events:
+                    if event == "end_array":
+                        break
+                    city = None
+                    for event, key in events:
+                        if event == "end_map":
+                            break
+                        if key != "professionals":
+                            value = _json_value(events, next(events))
+                            if key == "name":
+                                city = value
+                            continue
+                        next(events)  # start_array
+                        for first in events:
+                            if first[0] == "end_array":
+                                break
+                            business = _json_value(events, first)
+                            yield {
+                                "type": "business",
+                                "slug": meta.get("slug") or category_slug(business.get("category")),
+                                "language": meta.get("language"),
+                                "city": city or business.get("city"),
+                                "business": business,
+                            }
+            yield {
+                "type": "category",
+                "slug": meta.get("slug"),
+                "language": meta.get("language"),
+                "translations": {k: meta.get(k) for k in ("name_en", "name_de", "name_fr", "name_it")},
+            }
+
+
+def iter_output_records(path):
+    """
+    Stream category and business records out of any scraper output:
+    localch_live_*.json, their .json.gz snapshots, and .jsonl journals.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".jsonl.gz")):
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record["slug"] = category_slug(record.get("category"))
+                yield record
+        else:
+            yield from _iter_output_json(iter_json_events(f))
+
+
+def write_categories_json(f, categories):
+    """
+    Write the save_to_json layout incrementally. `categories` yields
+    (entry, cities) where entry holds the category fields, cities yields
+    (city_name, professionals) and professionals yields dicts.
+    """
+    f.write('{\n  "categories": [')
+    separator = "\n    "
+    for entry, cities in categories:
+        f.write(separator + "{")
+        separator = ",\n    "
+        for key, value in entry.items():
+            f.write(f"\n      {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},")
+        f.write('\n      "cities": [')
+        city_separator = "\n        "
+        for city_name, professionals in cities:
+            f.write(f'{city_separator}{{"name": {json.dumps(city_name, ensure_ascii=False)}, "professionals": [')
+            city_separator = ",\n        "
+            item_separator = "\n          "
+            for business in professionals:
+                f.write(item_separator + json.dumps(business, ensure_ascii=False))
+                item_separator = ",\n          "
+            f.write("]}")
+        f.write("]\n    }")
+    f.write("\n  ]\n}\n")
+
+
+# -------------------- OUTPUT MERGE --------------------
+class OutputMerger:
+    """
+    De-duplicating merge of scraper outputs with SQLite as the external
+    store. A category is a (slug, language) pair, as extra plan languages
+    are crawled separately. Within a category, professionals are unique by
+    canonical URL and by email (first one added wins); category
+    translations are merged field by field, and the result is streamed
+    back out, so memory does not grow with input size.
+    """
+
+    TRANSLATION_FIELDS = ("name_en", "name_de", "name_fr", "name_it")
+
+    def __init__(self, path, batch_size=5000):
+        self.path = path
+        self.batch_size = batch_size
+        if os.path.exists(path):
+            os.remove(path)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE categories (slug TEXT NOT NULL, language TEXT NOT NULL,"
+            " name_en TEXT, name_de TEXT, name_fr TEXT, name_it TEXT, PRIMARY KEY (slug, language))"
+        )
+        self._conn.execute(
+            "CREATE TABLE professionals (seq INTEGER PRIMARY KEY, slug TEXT NOT NULL, language TEXT NOT NULL,"
+            " url TEXT, email TEXT, city TEXT, record TEXT NOT NULL,"
+            " UNIQUE (slug, language, url), UNIQUE (slug, language, email))"
+        )
+        self.stats = {"files": 0, "records": 0, "professionals": 0, "duplicates": 0}
+        self._pending = 0
+        self._conn.execute("BEGIN")
+
+    def add_file(self, path):
+        for record in iter_output_records(path):
+            self.add(record)
+        self.stats["files"] += 1
+
+    def add(self, record):
+        self.stats["records"] += 1
+        slug = record.get("slug") or ""
+        language = record.get("language") or "en"
+        if record.get("type") == "category":
+            translations = record.get("translations") or {}
+            self._conn.execute(
+                "INSERT INTO categories (slug, language, name_en, name_de, name_fr, name_it)"
+                " VALUES (?, ?, NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''), NULLIF(?, ''))"
+                " ON CONFLICT (slug, language) DO UPDATE SET"
+                " name_en = COALESCE(categories.name_en, excluded.name_en),"
+                " name_de = COALESCE(categories.name_de, excluded.name_de),"
+                " name_fr = COALESCE(categories.name_fr, excluded.name_fr),"
+                " name_it = COALESCE(categories.name_it, excluded.name_it)",
+                (slug, language, *(translations.get(f) for f in self.TRANSLATION_FIELDS)),
+            )
+        elif record.get("type") == "business":
+            business = dict(record.get("business") or {})
+            business["city"] = record.get("city") or business.get("city")
+            url = canonical_url(business["url"]) if business.get("url") else None
+            email = (business.get("email") or "").strip().lower() or None
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO professionals (slug, language, url, email, city, record)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (slug, language, url, email, business["city"], json.dumps(business, ensure_ascii=False)),
+            ).rowcount
+            self.stats["professionals" if inserted else "duplicates"] += 1
+        else:
+            return
+
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._conn.execute("COMMIT")
+            self._conn.execute("BEGIN")
+            self._pending = 0
+
+    def _categories(self):
+        rows = self._conn.execute(
+            "SELECT s.slug, s.language, c.name_en, c.name_de, c.name_fr, c.name_it"
+            " FROM (SELECT slug, language FROM categories UNION SELECT DISTINCT slug, language FROM professionals) s"
+            " LEFT JOIN categories c USING (slug, language) ORDER BY s.slug, s.language"
+        )
+        for slug, language, *names in rows:
+            entry = dict(zip(self.TRANSLATION_FIELDS, names))
+            entry.update({"slug": slug, "language": language})
+            yield entry, self._cities(slug, language)
+
+    def _cities(self, slug, language):
+        rows = self._conn.execute(
+            "SELECT city, record FROM professionals WHERE slug = ? AND language = ? ORDER BY city, seq",
+            (slug, language),
+        )
+        for city, group in itertools.groupby(rows, key=lambda row: row[0]):
+            yield city, (json.loads(record) for _, record in group)
+
+    def write_json(self, output_path):
+        """Write the merged dataset in the save_to_json layout (gzipped if the name ends in .gz)."""
+        self._conn.execute("COMMIT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS professionals_slug_city ON professionals (slug, language, city, seq)")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_path = f"{output_path}.tmp"
+        opener = gzip.open if output_path.endswith(".gz") else open
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            write_categories_json(f, self._categories())
+        os.replace(tmp_path, output_path)
+        self._conn.execute("BEGIN")
+        return output_path
+
+    def close(self, keep=False):
+        try:
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            pass
+        self._conn.close()
+        if not keep and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# -------------------- LISTING PARSER --------------------
+def parse_listing_page(html, page_url):
+    """
+    Parse a city listing page in one pass.
+    Returns {"detail_urls": [...], "next_url": str | None}.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    detail_urls = []
+    seen = set()
+
+    for card in soup.select("article[data-testid*='list-element-desktop']"):
+        title = card.find("h2", attrs={"data-testid": "title"})
+        if title is None:
+            title = card.find("h2", class_=re.compile(r"lk"))
+
+        anchor = None
+        if title is not None:
+            anchor = title.find_parent("a", href=True) or title.find("a", href=True)
+        if anchor is None:
+            anchor = card.find("a", href=True)
+        if anchor is None:
+            continue
+
+        url = urljoin(page_url, anchor["href"])
+        if url not in seen:
+            seen.add(url)
+            detail_urls.append(url)
+
+    next_url = None
+    button = soup.find("button", id="load-next-page")
+    if button is not None and not button.has_attr("disabled"):
+        anchor = button.find_parent("a", href=True)
+        if anchor is not None:
+            next_url = urljoin(page_url, anchor["href"])
+
+    return {"detail_urls": detail_urls, "next_url": next_url}
+
+
+# -------------------- DETAIL PARSER --------------------
+def is_application_error(html):
+    """True if the page is the site's 'Application error' / client crash screen."""
+    html = html.lower()
+    return "application error" in html or "client-side exception" in html
+
+
+def parse_email(soup):
+    email_tag = soup.find("a", {"data-testid": "contact-link"}, href=lambda x: x and x.startswith("mailto:"))
+    if email_tag:
+        return email_tag.get_text(strip=True)
+    return None
+
+
+def parse_address(soup):
+    address_section = soup.select_one("div[data-cy='detail-map-preview']")
+    if address_section is None:
+        return None
+
+    # Combine all address fragments, skipping the 'sh' helper spans
+    address_parts = []
+    for span in address_section.find_all("span"):
+        if span.get("class") == ["sh"]:
+            continue
+        # Collapses non-breaking spaces and line breaks as well
+        text = re.sub(r"\s+", " ", span.get_text()).strip()
+        if text:
+            address_parts.append(text)
+
+    return ", ".join(address_parts) if address_parts else None
+
+
+def parse_rating(soup):
+    # Select the main ratings section, ignoring teaser sliders
+    rating_section = soup.select_one("div[data-testid='ratings-section']")
+    if rating_section:
+        rating_tag = rating_section.select_one("span[data-testid='average-rating']")
+        if rating_tag:
+            return rating_tag.get_text(strip=True)
+    return None
+
+
+def parse_detail_page(html, url):
+    """
+    Extract a business record from a detail page in a single parse.
+    Returns {"title", "address", "rating", "email", "url"}.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    h1 = soup.find("h1")
+    return {
+        "title": h1.get_text(strip=True) if h1 else None,
+        "address": parse_address(soup),
+        "rating": parse_rating(soup),
+        "email": parse_email(soup),
+        "url": url,
+    }
+
+
+# -------------------- ASYNC CRAWL ENGINE --------------------
+class AsyncCrawlEngine:
+    """
+    asyncio engine for the discovery and detail stages over plain HTTP.
+    One global semaphore caps requests in flight and the scraper's
+    RequestGovernor paces each host (never above `rate_per_host`), backs
+    off transient failures and application-error pages, and holds requests
+    while a host's circuit is open. Pages are parsed with
+    the same parse_* functions as the browser path, and results go through
+    the scraper's journal, frontier and business index.
+    """
+
+    def __init__(self, scraper, concurrency=100, rate_per_host=5.0, category_concurrency=8, retries=2):
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.category_concurrency = category_concurrency
+        self.retries = retries
+        self.stats = {"requests": 0, "errors": 0, "retries": 0, "details": 0, "reused": 0}
+
+    async def fetch(self, url):
+        """Return (final_url, html), or (None, None) if the page could not be fetched."""
+        s = self.scraper
+        if s.replay:
+            try:
+                final_url, html = s.archive.get(url)
+            except FetchError as e:
+                self.stats["errors"] += 1
+                s.log(f"⚠️ Async fetch failed: {e}")
+                return None, None
+            s.metrics.incr("pages", source="async")
+            return final_url, html
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Backoff happens outside the slot so waiting requests don't starve other hosts
+                self.stats["retries"] += 1
+                await asyncio.sleep(s.governor.backoff(attempt - 1))
+            async with self._slots:
+                await s.governor.acquire_async(host)
+                self.stats["requests"] += 1
+                started = time.monotonic()
+                try:
+                    final_url, html = await self._http.get(url)
+                except TransientFetchError as e:
+                    s.governor.record(host, False)
+                    s.log(f"⚠️ Async fetch failed (attempt {attempt + 1}/{self.retries + 1}): {e}")
+                    continue
+                except FetchError as e:
+                    s.governor.record(host, True)  # a 404 is the site answering, not struggling
+                    self.stats["errors"] += 1
+                    s.metrics.incr("errors", stage="async_fetch")
+                    s.log(f"⚠️ Async fetch failed: {e}")
+                    return None, None
+                finally:
+                    s.metrics.observe("async_http_get", time.monotonic() - started)
+                s.metrics.incr("pages", source="async")
+
+            if is_application_error(html):
+                s.governor.record(host, False, kind="application_error")
+                s.metrics.incr("application_errors")
+                s.log(f"⚠️ Application error page (attempt {attempt + 1}/{self.retries + 1}): {url}")
+                continue
+            s.governor.record(host, True)
+            s._archive_page(url, html, final_url, source="async")
+            return final_url, html
+
+        self.stats["errors"] += 1
+        s.metrics.incr("errors", stage="async_fetch")
+        return None, None
+
+    async def discover(self, url, parse):
+        page_url, html = await self.fetch(url)
+        return parse(html, page_url) if html else None
+
+    async def crawl(self):
+        # Loop-bound primitives must be created inside the running loop
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._category_slots = asyncio.Semaphore(self.category_concurrency)
+        self.scraper.governor.set_max_rate(self.rate_per_host)
+        self._compacting = asyncio.Lock()
+        self._http = AsyncHttpFetcher()
+        s = self.scraper
+
+        try:
+            letters = await self.discover(f"{s.base_url}/en/categories", parse_category_letters) or []
+            letters = [
+                l for l in letters
+                if s.plan.allows(l["letter"]) and not s.frontier.is_done("letter", l["letter"])
+            ]
+            s.log(f"🔠 Total enabled letters: {len(letters)}")
+
+            category_lists = await asyncio.gather(*(self.discover(l["url"], parse_categories) for l in letters))
+            jobs, queued = [], 0
+            for letter_data, categories in zip(letters, category_lists):
+                letter = letter_data["letter"]
+                planned = s._planned_categories(letter, categories or [])
+                if not planned:
+                    continue
+                pending = [c for c in planned if not s.frontier.is_done("category", s._category_key(letter, c))]
+                queued += len(pending)
+                jobs.append(self.crawl_letter(letter, pending))
+            s.log(f"⚡ Async engine: {queued} categories queued")
+            await asyncio.gather(*jobs)
+        finally:
+            await self._http.close()
+
+    async def crawl_letter(self, letter, categories):
+        """Crawl a letter's categories; like run(), mark it done only if all of them finished."""
+        s = self.scraper
+        results = await asyncio.gather(*(self.crawl_category(letter, cat_data) for cat_data in categories))
+        if all(results):
+            s.frontier.mark("letter", letter, CrawlFrontier.DONE)
+        # Letter finished: rewrite its JSON snapshot from the journal, one compaction at a time
+        async with self._compacting:
+            await asyncio.to_thread(s.compact_all)
+        s.tally.release(letter)
+
+    async def crawl_category(self, letter, cat_data):
+        s = self.scraper
+        slug, name, lang = cat_data["slug"], cat_data["name"], cat_data["language"]
+        suffix = f"_{letter.lower()}"
+        category_key = s._category_key(letter, cat_data)
+
+        async with self._category_slots:
+            try:
+                s.log(f"\n🔍 Category: {name} ({lang})", category_suffix=suffix)
+                s.frontier.mark("category", category_key, CrawlFrontier.IN_PROGRESS)
+
+                subletters = await self.discover(s._category_url(cat_data), lambda html, url: parse_subletters(html))
+                translations = await self.translations(cat_data)
+                s._save_category(letter, name, lang, translations, f"_{slug[0].lower()}")
+                if subletters is None:
+                    s.log(f"⏸️ Category {name} ({lang}) left pending: category page not fetched", category_suffix=suffix)
+                    s.tally.release(letter, name, lang)
+                    return False
+
+                subletters = [
+                    subletter for subletter in subletters
+                    if not s.frontier.is_done("subletter", f"{category_key}/{subletter}")
+                ]
+                city_lists = await asyncio.gather(*(
+                    self.discover(s._category_url(cat_data, subletter), parse_cities) for subletter in subletters
+                ))
+                cities_by_subletter = {
+                    f"{category_key}/{subletter}": None if cities is None else s._planned_cities(letter, cat_data, cities)
+                    for subletter, cities in zip(subletters, city_lists)
+                }
+                # Same journal as the category record, so one flush covers the city marks
+                city_suffix = f"_{slug[0].lower()}"
+                await asyncio.gather(*(
+                    self.crawl_city(city, name, slug, letter, lang, city_suffix)
+                    for cities in cities_by_subletter.values() for city in cities or []
+                ))
+                # The journal flush waits for fsync, so it runs off the event loop
+                return await asyncio.to_thread(s._finish_category, letter, cat_data, cities_by_subletter)
+            except Exception as e:
+                s.log(f"⚠️ Category {name} failed: {e}", category_suffix=suffix)
+                return False
+
+    async def translations(self, cat_data):
+        s = self.scraper
+        cached = s._load_cached_translations(cat_data["slug"])
+        if cached:
+            return cached
+
+        page = await self.discover(s._category_url(cat_data), parse_category_heading)
+        alternates = page["alternates"] if page else {}
+        langs = [lang for lang in ["en", "de", "fr", "it"] if not (page and lang == cat_data["language"])]
+        localized = await asyncio.gather(*(
+            self.discover(alternates.get(lang) or s._category_url(dict(cat_data, language=lang)), parse_category_heading)
+            for lang in langs
+        ))
+
+        headings = dict(zip(langs, (p["heading"] if p else None for p in localized)))
+        if page:
+            headings[cat_data["language"]] = page["heading"]
+
+        translations = {
+            f"name_{lang}": s.extract_category_name(headings[lang], lang) if headings.get(lang) else None
+            for lang in ["en", "de", "fr", "it"]
+        }
+        if any(translations.values()):
+            s._store_cached_translations(cat_data["slug"], translations)
+        return translations
+
+    async def crawl_city(self, city, category_name, category_slug, column, language, suffix):
+        s = self.scraper
+        clean_city = s.clean_city_name(city["name"], language)
+        max_pages = s.plan.max_pages(column, category_slug, language, clean_city)
+        city_key = s._city_key(column, category_name, city)
+        if s.frontier.is_done("city", city_key):
+            return
+
+        _, progress = s.frontier.get("page", city_key)
+        page_url = progress["url"] if progress else city["url"]
+        page_number = progress["page"] if progress else 1
+        s.frontier.mark("city", city_key, CrawlFrontier.IN_PROGRESS)
+
+        business_prefix = f"{column}/{category_name}/{clean_city}|"
+        failed = s.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            # Page progress has moved past these, so they are retried by URL
+            s.log(f"🔁 Retrying {len(failed)} failed businesses in {clean_city}", category_suffix=suffix)
+            await asyncio.gather(*(
+                self.scrape_detail(key[len(business_prefix):], index, category_name, clean_city, column, language, suffix)
+                for index, key in enumerate(failed, start=1)
+            ))
+
+        fetched = await self.fetch(page_url)
+        while True:
+            final_url, html = fetched
+            if not html:
+                return
+            links = parse_listing_page(html, final_url)
+            s.log(f"🔍 Found {len(links['detail_urls'])} businesses on page {page_number} for {clean_city}.", category_suffix=suffix)
+
+            next_url = links["next_url"]
+            if max_pages and page_number >= max_pages:
+                s.log(f"✂️ Page limit {max_pages} reached for {clean_city}", category_suffix=suffix)
+                next_url = None
+            # The next listing page loads while this page's details are scraped
+            prefetch = asyncio.ensure_future(self.fetch(next_url)) if next_url else None
+
+            await asyncio.gather(*(
+                self.scrape_detail(detail_url, index, category_name, clean_city, column, language, suffix)
+                for index, detail_url in enumerate(links["detail_urls"], start=1)
+            ))
+
+            if prefetch is None:
+                break
+            page_number += 1
+            s._mark_durable(suffix, "page", city_key, CrawlFrontier.IN_PROGRESS, {"url": next_url, "page": page_number})
+            fetched = await prefetch
+
+        failed = s.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            # Retried businesses are only marked done once their records are synced
+            await asyncio.to_thread(s._journal(suffix, dirty=False).flush)
+            failed = s.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            s.log(f"⏸️ City {clean_city} left pending: {len(failed)} businesses failed", category_suffix=suffix)
+            return
+        s._mark_durable(suffix, "city", city_key, CrawlFrontier.DONE)
+
+    async def scrape_detail(self, detail_url, index, category_name, clean_city, column, language, suffix):
+        s = self.scraper
+        business_key = f"{column}/{category_name}/{clean_city}|{detail_url}"
+        if s.frontier.is_done("business", business_key):
+            return
+
+        canonical = canonical_url(detail_url)
+        record = s.business_index.get(canonical)
+        reused = record is not None
+        if record is None:
+            final_url, html = await self.fetch(detail_url)
+            if not html:
+                s.frontier.mark("business", business_key, CrawlFrontier.FAILED)
+                return
+            record = parse_detail_page(html, final_url)
+            if s._is_duplicate_email(record, suffix):
+                s._mark_durable(suffix, "business", business_key, CrawlFrontier.DONE, {"saved": False})
+                return
+            s.business_index.add(canonical, record)
+            self.stats["details"] += 1
+        else:
+            self.stats["reused"] += 1
+
+        saved = s._store_business_record(record, index, category_name, clean_city, column, language, suffix, reused=reused)
+        s._mark_durable(suffix, "business", business_key, CrawlFrontier.DONE, {"saved": saved})
 
 
 class LocalChScraper:
-    def __init__(self, excel_path):
+    def __init__(self, excel_path, parent=None, worker_id=None, direct_detail=True,
+                 base_url=BASE_URL, http_first=True, wait_timeouts=None, resume=False,
+                 dedupe_emails=False, blocking_profile="strict", page_load_strategy="eager",
+                 log_level="INFO", log_json=False, snapshot_interval=600, snapshot_keep=24,
+                 archive_mode=None, archive_dir=None, export_formats=(), shard=None,
+                 driver_max_pages=500, driver_max_memory_mb=1024):
         self.excel_path = excel_path
-        self.driver = self._init_driver()
-        self.final_data = {}
+        self.worker_id = worker_id
+        # Open detail pages by URL collected from the listing instead of click + back()
+        self.direct_detail = direct_detail if parent is None else parent.direct_detail
+        self.base_url = (base_url if parent is None else parent.base_url).rstrip("/")
+        # Try plain HTTP for discovery pages before falling back to the browser
+        self.http_first = http_first if parent is None else parent.http_first
+        # Adaptive per-host pacing, backoff and circuit breaker shared by every fetch path and worker
+        self.governor = RequestGovernor(log=self.log) if parent is None else parent.governor
+        self.http = HttpFetcher(governor=self.governor) if parent is None else parent.http
+        self._cookies_accepted = False
+        self.waits = WaitPolicy(wait_timeouts) if parent is None else parent.waits
+        self.resource_blocker = ResourceBlocker(blocking_profile) if parent is None else parent.resource_blocker
+        # normal / eager / none: eager returns at DOMContentLoaded, waits handle the rest
+        self.page_load_strategy = page_load_strategy if parent is None else parent.page_load_strategy
+        if parent is not None:
+            # Worker session: own browser, shared results/journals with the parent
+            self.run_id = parent.run_id
+            self.log_backend = parent.log_backend
+            self.snapshots = parent.snapshots
+            self.metrics = parent.metrics
+            self.tally = parent.tally
+            self.output_dir = parent.output_dir
+            self._journals = parent._journals
+            self._dirty_journals = parent._dirty_journals
+            self._lock = parent._lock
+            self.resume = parent.resume
+            self.frontier = parent.frontier
+            self.business_index = parent.business_index
+            self.dedupe_emails = parent.dedupe_emails
+            self.archive = parent.archive
+            self.replay = parent.replay
+            self.exporter = parent.exporter
+            self.plan = parent.plan
+            self.shard = parent.shard
+        else:
+            self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.log_backend = LogBackend(self.run_id, level=log_level, json_lines=log_json)
+            self.snapshots = SnapshotService(interval=snapshot_interval, keep=snapshot_keep, log=self.log)
+            self.metrics = RunMetrics()
+            # Per-category counts for the logs; the journals hold the businesses
+            self.tally = CategoryTally()
+            # (index, count): only categories that hash to this shard are crawled
+            self.shard = parse_shard(shard) if isinstance(shard, str) else shard
+            self.output_dir = os.path.join(os.getcwd(), "scraping_data")
+            if self.shard:
+                # Separate runners keep separate outputs, frontier and indexes
+                self.output_dir = os.path.join(self.output_dir, f"shard_{self.shard[0]}_of_{self.shard[1]}")
+            self._journals = {}
+            self._dirty_journals = set()
+            self._lock = threading.RLock()
+            # With resume, completed work in the frontier is skipped and journals are appended to
+            self.resume = resume
+            self.frontier = CrawlFrontier(os.path.join(self.output_dir, "frontier.sqlite"))
+            if not resume:
+                self.frontier.reset()
+            # Detail pages already extracted this crawl are reused instead of reloaded
+            self.business_index = BusinessIndex(os.path.join(self.output_dir, "business_index.sqlite"), reset=not resume)
+            self.dedupe_emails = dedupe_emails
+            # "record" keeps the raw HTML of every fetched page; "replay" re-extracts from it offline
+            self.archive = PageArchive(archive_dir or os.path.join(self.output_dir, "archive")) if archive_mode else None
+            self.replay = archive_mode == "replay"
+            if self.replay:
+                # Discovery pages come from the archive instead of the network
+                self.http = self.archive
+            # Letters, categories, languages and cities to crawl, from the workbook
+            self.plan = CrawlPlan()
+            try:
+                self.plan = CrawlPlan.load(excel_path, log=self.log)
+            except Exception as e:
+                self.log(f"⚠️ Failed to read crawl plan {excel_path}: {e} — crawling everything")
+            if self.plan:
+                self.log(f"🗺️ Crawl plan: {self.plan.summary()}")
+            # Flat CSV / Parquet / XLSX rows written as businesses are saved
+            self.exporter = None
+            if export_formats:
+                self.exporter = StreamingExporter(
+                    os.path.join(self.output_dir, "exports"), self.run_id, export_formats, log=self.log
+                )
+                if resume:
+                    # Businesses saved by earlier runs are only in the journals
+                    for name in sorted(os.listdir(self.output_dir)):
+                        if name.startswith("localch_live") and name.endswith(".jsonl"):
+                            self.exporter.replay_journal(os.path.join(self.output_dir, name))
+
+        # The browser is only started once something actually needs it, and is
+        # recycled or respawned by the manager instead of living for the whole run
+        if parent is not None:
+            driver_max_pages, driver_max_memory_mb = parent.drivers.max_pages, parent.drivers.max_memory_mb
+        self.drivers = DriverManager(
+            self._init_driver, retire=self._retire_driver, log=self.log, metrics=self.metrics,
+            max_pages=driver_max_pages, max_memory_mb=driver_max_memory_mb,
+        )
 
     # -------------------- DRIVER --------------------
+    @property
+    def driver(self):
+        return self.drivers.get()
+
+    def quit_driver(self):
+        self.drivers.quit()
+        if self.drivers.stats["sessions"]:
+            self.log(f"🖥️ Browser sessions: {self.drivers.stats}")
+
+    def _retire_driver(self, driver):
+        self.resource_blocker.collect(driver)
+        # A new session starts without the consent cookie
+        self._cookies_accepted = False
+
+    def _retry_on_crash(self, task, fn, *args, attempts=2):
+        """
+        Run `fn(*args)`; if the browser session dies underneath it, start a
+        new session and run the task again (up to `attempts` more times).
+        """
+        for attempt in range(attempts + 1):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt == attempts or not self.drivers.handle_crash(e):
+                    raise
+                # Apply the deferred frontier marks so the re-run skips what is already saved
+                self.flush_journals()
+                self.log(f"🔁 Re-running {task} on a new browser session ({attempt + 1}/{attempts})")
+
     def _init_driver(self):
+        if self.replay:
+            return ReplayDriver(self.archive)
         options = Options()
         options.add_argument("--start-maximized")
         options.add_argument("--disable-gpu")
@@ -34,35 +2813,27 @@ class LocalChScraper:
         options.add_argument("--headless=new")  # Run in headless mode
         options.add_argument("--disable-gpu")  # Disable GPU acceleration (optional)
         options.add_argument("--window-size=1920,1080")
-        options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
+        options.add_argument(f"user-agent={USER_AGENT}")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
         options.add_argument("--disable-blink-features=AutomationControlled")
+        options.page_load_strategy = self.page_load_strategy
+        self.resource_blocker.apply_options(options)
 
         service = Service()
         driver = webdriver.Edge(service=service, options=options)
-        driver.implicitly_wait(6)  # slightly reduced implicit wait
+        # No implicit wait: a failed find_element should fail fast, waits are explicit
+        driver.implicitly_wait(0)
+        try:
+            self.resource_blocker.attach(driver)
+        except Exception as e:
+            self.log(f"⚠️ Could not enable request blocking: {e}")
         return driver
 
     # -------------------- LOGGING --------------------
-    def log(self, message, category_suffix="_log"):
-        """Log message with IST timestamp to unique per-run log file."""
-        if not hasattr(self, "run_id"):
-            self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        ist_time = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
-        timestamp = ist_time.strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)
-
-        log_filename = f"logs/localch_live{category_suffix}_{self.run_id}.log"
-        os.makedirs("logs", exist_ok=True)
-        with open(log_filename, "a", encoding="utf-8") as f:
-            f.write(log_message + "\n")
+    def log(self, message, category_suffix="_log", level=logging.INFO):
+        """Log message with IST timestamp to unique per-run log file (queued, written in the background)."""
+        self.log_backend.logger.log(level, message, extra={"suffix": category_suffix, "worker": self.worker_id})
 
     # -------------------- CATEGORY NAME REGEX CLEANER --------------------
     def extract_category_name(self, text, lang):
@@ -70,7 +2841,7 @@ class LocalChScraper:
         Cleans heading text and extracts only the raw category name.
         Works across all supported languages automatically.
         """
-        print(f"🔍 Extracting category name from [{lang.upper()}]: '{text}'")
+        self.log(f"🔍 Extracting category name from [{lang.upper()}]: '{text}'", level=logging.DEBUG)
 
         original_text = text.strip()
         text = re.sub(r'\s+', ' ', original_text)
@@ -97,16 +2868,32 @@ class LocalChScraper:
         clean_name = re.sub(r'\s+', ' ', clean_name).strip()
         clean_name = clean_name[0].upper() + clean_name[1:] if clean_name else clean_name
 
-        self.log(f"🧩 Cleaned category for [{lang.upper()}]: '{original_text}' → '{clean_name}'")
+        self.log(f"🧩 Cleaned category for [{lang.upper()}]: '{original_text}' → '{clean_name}'", level=logging.DEBUG)
         return clean_name
 
   
     # -------------------- WAIT HELPERS --------------------
+    def _wait(self, name, condition, timeout=None, raise_on_timeout=False):
+        if self.replay:
+            # Archived pages are already complete and there is no live DOM to poll
+            if raise_on_timeout:
+                raise TimeoutException(f"{name}: no live DOM in replay mode")
+            return True
+        return self.waits.until(self.driver, name, condition, timeout=timeout, raise_on_timeout=raise_on_timeout)
+
     def _wait_for_clickable(self, by, selector, timeout=8):
-        return WebDriverWait(self.driver, timeout).until(EC.element_to_be_clickable((by, selector)))
+        return self._wait("clickable", EC.element_to_be_clickable((by, selector)), timeout, raise_on_timeout=True)
 
     def _wait_for_presence(self, by, selector, timeout=8):
-        return WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((by, selector)))
+        return self._wait("presence", EC.presence_of_element_located((by, selector)), timeout, raise_on_timeout=True)
+
+    def _wait_for_page(self):
+        return self._wait("body", page_ready)
+
+    def _wait_for_listing(self):
+        return self._wait("listing", EC.presence_of_element_located(
+            (By.XPATH, "//article[contains(@data-testid, 'list-element-desktop')]")
+        ))
 
     def _safe_click(self, element):
         """Try normal click, then JS click as fallback."""
@@ -133,7 +2920,11 @@ class LocalChScraper:
    
 
     # -------------------- FETCH MULTILANG CATEGORY NAMES --------------------
-    def fetch_multilang_categories(self):
+    def fetch_multilang_categories(self, url=None):
+        # Discovery may have run over HTTP, so make sure the browser shows the category
+        if url and self.driver.current_url.rstrip("/") != url.rstrip("/"):
+            self._browser_get(url)
+
         lang_codes = ["en", "de", "fr", "it"]
         lang_labels = {"de": "DE", "fr": "FR", "it": "IT", "en": "EN"}
         category_translations = {}
@@ -159,14 +2950,11 @@ class LocalChScraper:
                     # Open dropdown
                     dropdown = self._wait_for_clickable(By.CSS_SELECTOR, "button[aria-label='open menu']", timeout=8)
                     self._safe_click(dropdown)
-                    time.sleep(0.5)
 
                     # Wait for language option
-                    lang_option = WebDriverWait(self.driver, 8).until(
-                        EC.visibility_of_element_located(
-                            (By.XPATH, f"//ul[@role='listbox']//li//*[normalize-space(text())='{lang_labels[lang]}']")
-                        )
-                    )
+                    lang_option = self._wait("language_menu", EC.visibility_of_element_located(
+                        (By.XPATH, f"//ul[@role='listbox']//li//*[normalize-space(text())='{lang_labels[lang]}']")
+                    ), raise_on_timeout=True)
 
                     # Click safely
                     try:
@@ -175,11 +2963,10 @@ class LocalChScraper:
                         self.driver.execute_script("arguments[0].click();", lang_option)
 
                     # Wait for heading change, but don't fail if it doesn't change
-                    try:
-                        WebDriverWait(self.driver, 8).until(
-                            lambda d: d.find_element(By.TAG_NAME, "h1").text.strip() != old_text
-                        )
-                    except TimeoutException:
+                    changed = self._wait("heading_change", lambda d: any(
+                        h.text.strip() != old_text for h in d.find_elements(By.TAG_NAME, "h1")
+                    ))
+                    if not changed:
                         self.log(f"⚠️ Heading did not change for {lang.upper()}, continuing with current text...")
 
                 # Extract category name
@@ -188,8 +2975,6 @@ class LocalChScraper:
                 category_translations[f"name_{lang}"] = clean_name
                 self.log(f"✅ Extracted [{lang.upper()}]: {clean_name}")
 
-                time.sleep(0.5)
-
             except Exception as e:
                 # self.driver.save_screenshot("debug_fetch_multilang.png")
                 self.log(f"⚠️ Failed to fetch category for {lang.upper()}: {e}")
@@ -202,19 +2987,74 @@ class LocalChScraper:
             if current_lang.upper() != "EN":
                 dropdown = self._wait_for_clickable(By.CSS_SELECTOR, "button[aria-label='open menu']", timeout=5)
                 self._safe_click(dropdown)
-                en_option = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//ul[@role='listbox']//li//*[normalize-space(text())='EN']")
-                    )
-                )
+                en_option = self._wait("language_menu", EC.element_to_be_clickable(
+                    (By.XPATH, "//ul[@role='listbox']//li//*[normalize-space(text())='EN']")
+                ), timeout=5, raise_on_timeout=True)
                 self._safe_click(en_option)
+                self._wait("language_menu", EC.text_to_be_present_in_element(
+                    (By.CSS_SELECTOR, "button[aria-label='current language']"), "EN"
+                ), timeout=5)
                 self.log("🔁 Switched back to English (finalized)")
-                time.sleep(0.5)
         except Exception as e:
             self.log(f"⚠️ Failed to switch back to EN: {e}")
 
         return category_translations
 
+    # -------------------- CATEGORY TRANSLATIONS --------------------
+    def fetch_category_translations(self, cat_data):
+        """
+        name_en/de/fr/it for a category without touching the language menu.
+        The category page is fetched once; the other languages come from its
+        hreflang alternates (or the localized category URL when missing).
+        Results are cached on disk per slug.
+        """
+        cached = self._load_cached_translations(cat_data["slug"])
+        if cached:
+            return cached
+
+        url = self._category_url(cat_data)
+        page = self._discover(url, parse_category_heading)
+        alternates = page["alternates"] if page else {}
+
+        translations = {}
+        for lang in ["en", "de", "fr", "it"]:
+            heading = None
+            try:
+                if page and lang == cat_data["language"]:
+                    heading = page["heading"]
+                else:
+                    lang_url = alternates.get(lang) or self._category_url(dict(cat_data, language=lang))
+                    localized = self._discover(lang_url, parse_category_heading)
+                    heading = localized["heading"] if localized else None
+            except Exception as e:
+                self.log(f"⚠️ Failed to fetch category for {lang.upper()}: {e}")
+            translations[f"name_{lang}"] = self.extract_category_name(heading, lang) if heading else None
+
+        if not any(translations.values()):
+            # Last resort: the old UI language switch
+            return self.fetch_multilang_categories(url)
+
+        self._store_cached_translations(cat_data["slug"], translations)
+        return translations
+
+    def _translation_cache_path(self, slug):
+        return os.path.join(self.output_dir, "translations", f"{slug}.json")
+
+    def _load_cached_translations(self, slug):
+        try:
+            with open(self._translation_cache_path(slug), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached_translations(self, slug, translations):
+        cache_path = self._translation_cache_path(slug)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(translations, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+
     # -------------------- PARSE CATEGORY URL --------------------
     def _parse_category_url(self, url):
         try:
@@ -227,37 +3067,100 @@ class LocalChScraper:
             self.log(f"⚠️ Error parsing URL '{url}': {e}")
             return None
 
+    # -------------------- PAGE FETCH --------------------
+    def _accept_cookies(self):
+        """Dismiss the cookie banner once per browser session."""
+        if self._cookies_accepted or self.replay:
+            return
+        cookie_button = self._wait("cookie", EC.element_to_be_clickable(
+            (By.XPATH, "//button[contains(@class,'ot-sdk-btn') or contains(text(),'Accept')]")
+        ))
+        if cookie_button is not None:
+            self._safe_click(cookie_button)
+            self._wait("cookie", EC.invisibility_of_element(cookie_button))
+        else:
+            self.log("No cookie popup found")
+        self._cookies_accepted = True
+
+    def _page_get(self, url):
+        """driver.get, paced by the governor, timed and counted as a page load."""
+        host = urlsplit(url).netloc
+        if not self.replay:
+            self.governor.acquire(host)
+        try:
+            with self.metrics.time("driver_get"):
+                self.driver.get(url)
+        except Exception:
+            self.governor.record(host, False)
+            raise
+        self.governor.record(host, True)
+        self.drivers.page_loaded()
+        self.metrics.incr("pages", source="browser")
+
+    def _browser_get(self, url):
+        self._page_get(url)
+        self._wait_for_page()
+        self._accept_cookies()
+
+    def _discover(self, url, parse):
+        """
+        Fetch a server-rendered discovery page and run `parse(html, page_url)`.
+        Plain HTTP is tried first; the browser is only used when the HTTP
+        response lacks the expected markers (i.e. the parser found nothing).
+        """
+        if self.http_first:
+            try:
+                with self.metrics.time("http_get"):
+                    final_url, html = self.http.get(url)
+                self.metrics.incr("pages", source="http")
+                self._archive_page(url, html, final_url, source="http")
+                with self.metrics.time("parse"):
+                    result = parse(html, final_url)
+                if result:
+                    return result
+                self.log(f"↩️ HTTP page lacked expected markers, using browser: {url}")
+            except FetchError as e:
+                self.log(f"↩️ HTTP fetch failed ({e}), using browser")
+            self.metrics.incr("http_fallbacks")
+
+        self._browser_get(url)
+        html = self.driver.page_source
+        self._archive_page(url, html, self.driver.current_url)
+        with self.metrics.time("parse"):
+            return parse(html, self.driver.current_url)
+
+    def _archive_page(self, url, html, final_url=None, source="browser"):
+        """Keep the raw HTML of a fetched page when recording."""
+        if self.archive is None or self.replay:
+            return
+        try:
+            self.archive.store(url, html, final_url, source)
+        except Exception as e:
+            self.log(f"⚠️ Failed to archive {url}: {e}")
+
+    def _category_url(self, cat_data, letter=None):
+        cat = cat_data["slug"]
+        lang = cat_data["language"]
+        first_letter = cat[0].lower()
+        # Determine base path based on language
+        category_path = "categories"
+        if lang == "it":
+            category_path = "categorie"
+        elif lang == "de":
+            category_path = "kategorien"
+
+        url = f"{self.base_url}/{lang}/{category_path}/{first_letter}/{cat}"
+        return f"{url}/{letter}" if letter else url
+
     # -------------------- GET CATEGORY LETTERS --------------------
     def get_category_letters(self):
         """Fetch all active A-Z category links from the main categories page."""
-        base_url = "https://www.local.ch/en/categories"
-        self.driver.get(base_url)
+        base_url = f"{self.base_url}/en/categories"
 
         self.log("🌐 Visiting main categories page")
-
-        # Wait for page to load
-        try:
-            WebDriverWait(self.driver, 8).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-        except Exception:
-            pass
-
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        letter_links = []
-
-        # Find heading first
-        heading = soup.find("h2", string=re.compile(r"Categories from A-Z", re.I))
-        if heading:
-            container = heading.find_next_sibling("div")
-            if container:
-                for a in container.find_all("a", href=True):
-                    text = a.get_text(strip=True).upper()
-                    if text.isalpha():  # only A-Z
-                        href = a["href"]
-                        full_url = urljoin(base_url, href)
-                        letter_links.append({"letter": text, "url": full_url})
-                        self.log(f"✅ Found letter link: {text} -> {full_url}")
+        letter_links = self._discover(base_url, parse_category_letters)
+        for link in letter_links:
+            self.log(f"✅ Found letter link: {link['letter']} -> {link['url']}", level=logging.DEBUG)
 
         self.log(f"🔠 Total enabled letters: {len(letter_links)}")
         return letter_links
@@ -267,39 +3170,10 @@ class LocalChScraper:
         letter = letter_data["letter"]
         url = letter_data["url"]
 
-        try:
-            cookie_button =  WebDriverWait(self.driver, 2).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(@class,'ot-sdk-btn') or contains(text(),'Accept')]"))
-            )
-            cookie_button.click()
-            time.sleep(1)
-        except TimeoutException:
-            print("No cookie popup found")
-
         self.log(f"➡️ Visiting letter page {letter}: {url}")
-        self.driver.get(url)
-        try:
-            WebDriverWait(self.driver, 6).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-        except Exception:
-            pass
-
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        categories = []
-
-        # Dynamically find the div containing categories
-        container = soup.find("div", {"class": re.compile(r"c\d+")})
-        if container:
-            for a in container.find_all("a", href=True):
-                name = a.get_text(strip=True)
-                href = a["href"]
-                # Only process real category links
-                if href and href != "/en":
-                    full_url = urljoin("https://www.local.ch", href)
-                    slug = href.rstrip("/").split("/")[-1]
-                    categories.append({"name": name, "slug": slug, "language": "en"})
-                    self.log(f"📂 Found category: {name} -> {full_url}")
+        categories = self._discover(url, parse_categories)
+        for cat in categories:
+            self.log(f"📂 Found category: {cat['name']} -> {cat['url']}", level=logging.DEBUG)
 
         self.log(f"✅ Found {len(categories)} categories for letter {letter}")
         return categories
@@ -309,126 +3183,79 @@ class LocalChScraper:
     def get_letters(self, cat_data):
         cat = cat_data["slug"]
         lang = cat_data["language"]
-        first_letter = cat[0].lower()
-        # Determine base path based on language
-        category_path = "categories"
-        if lang == "it":
-            category_path = "categorie"
-        elif lang == "de":
-            category_path = "kategorien"
-
-        base_url = f"https://www.local.ch/{lang}/{category_path}/{first_letter}/{cat}"
+        base_url = self._category_url(cat_data)
 
         self.log(f"🔍 Checking letters for: {cat} ({lang})")
         self.log(f"Base URL: {base_url}")
 
-        self.driver.get(base_url)
-        try:
-            WebDriverWait(self.driver, 6).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-        except Exception:
-            pass
-
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        letters = []
-
-        for a in soup.find_all("a", href=True):
-            text = a.get_text(strip=True).lower()
-            if len(text) == 1 and text.isalpha():
-                letters.append(text)
-
-        letters = sorted(list(set(letters)))
+        letters = self._discover(base_url, lambda html, page_url: parse_subletters(html))
         self.log(f"✅ Letters found: {letters}")
         return letters
 
     # -------------------- GET CITIES --------------------
     def get_cities_for_letter(self, cat_data, letter):
-        cat = cat_data["slug"]
-        lang = cat_data["language"]
-        first_letter = cat[0].lower()
-        category_path = "categories"
-        if lang == "it":
-            category_path = "categorie"
-        elif lang == "de":
-            category_path = "kategorien"
-
-        url = f"https://www.local.ch/{lang}/{category_path}/{first_letter}/{cat}/{letter}"
+        url = self._category_url(cat_data, letter)
 
         self.log(f"➡️ Opening letter page: {url}")
-        self.driver.get(url)
-        try:
-            WebDriverWait(self.driver, 6).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-        except Exception:
-            pass
-
-        cities = []
         try:
-            city_anchors = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'in ')]")
-            if not city_anchors:
-                city_anchors = self.driver.find_elements(By.XPATH, "//div[contains(@class,'cC')]//a[@href]")
-
-            for a in city_anchors:
-                try:
-                    text = a.text.strip()
-                    href = a.get_attribute("href")
-                    if href and text:
-                        city_name = text.split("in ")[-1] if "in " in text else text.split(".")[-1].strip()
-                        city_url = urljoin(url, href)
-                        cities.append({"name": city_name, "url": city_url})
-                except Exception as e:
-                    self.log(f"⚠️ Error parsing city link: {e}")
-
+            cities = self._discover(url, parse_cities)
         except Exception as e:
+            # None, not [], so the subletter stays pending instead of being marked done
             self.log(f"⚠️ Error finding cities: {e}")
+            return None
 
         self.log(f"✅ Found {len(cities)} cities for letter '{letter}'")
         return cities
 
-    # -------------------- EMAIL EXTRACTION --------------------
-    def extract_email_from_detail(self):
-        # try to scroll a bit to reveal email
-        for _ in range(3):
-            try:
-                self.driver.execute_script("window.scrollBy(0, window.innerHeight / 3);")
-                time.sleep(0.3)
-            except Exception:
-                pass
-
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        email_tag = soup.find("a", {"data-testid": "contact-link"}, href=lambda x: x and x.startswith("mailto:"))
-        if email_tag:
-            return email_tag.get_text(strip=True)
-        return None
-
-    # -------------------- ADDRESS EXTRACTION --------------------
-    def extract_address_from_detail(self):
+    # -------------------- DETAIL EXTRACTION --------------------
+    def _reveal_detail_content(self):
+        """Scroll a bit to trigger lazy sections (email), then wait until they render."""
         try:
-            # Wait until address section appears
-            address_section = WebDriverWait(self.driver, 6).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-cy='detail-map-preview']"))
-            )
-
-            # Use the driver element (faster than re-parsing) to get address pieces
-            address_spans = address_section.find_elements(By.XPATH, ".//span[not(@class='sh')]")
+            self.driver.execute_script("window.scrollBy(0, window.innerHeight);")
+        except Exception:
+            pass
 
-            # Combine all visible address fragments
-            address_parts = []
-            for span in address_spans:
-                text = span.text.strip()
-                if text:
-                    # Replace non-breaking space
-                    text = text.replace(u'\xa0', ' ')
-                    address_parts.append(text)
+        if not self._wait("detail_content", detail_content_ready):
+            self.log("⚠️ Address section did not appear")
 
-            address_text = ", ".join(address_parts) if address_parts else None
-            return address_text
+    def _healthy_page_source(self):
+        """Grab the DOM once; only re-read it if an application error forced a refresh."""
+        html = self.driver.page_source
+        if is_application_error(html) and self._recover_from_application_error(html=html):
+            html = self.driver.page_source
+        self._archive_page(self.driver.current_url, html)
+        return html
 
+    def _extract(self, script):
+        """
+        Read the loaded page with one extraction script. Returns None when
+        page_source should be parsed instead: recording raw pages, script
+        failure, or an application error that a refresh did not fix.
+        """
+        if self.archive is not None:
+            return None
+        try:
+            with self.metrics.time("dom_extract"):
+                data = self.driver.execute_script(script)
+                if isinstance(data, dict) and data.get("error") and self._recover_from_application_error():
+                    data = self.driver.execute_script(script)
         except Exception as e:
-            self.log(f"⚠️ Failed to extract address: {e}")
+            self.log(f"↩️ Script extraction failed ({e}), parsing page source", level=logging.DEBUG)
+            return None
+        if not isinstance(data, dict) or data.get("error"):
             return None
+        return data
+
+    def extract_detail_record(self):
+        """Title, email, address, rating and URL of the loaded detail page in one pass."""
+        self._reveal_detail_content()
+        data = self._extract(DETAIL_EXTRACT_JS)
+        if data is not None:
+            return {field: data.get(field) for field in ("title", "address", "rating", "email", "url")}
+
+        html = self._healthy_page_source()
+        with self.metrics.time("parse"):
+            return parse_detail_page(html, self.driver.current_url)
 
     # -------------------- City Extraction --------------------
     def clean_city_name(self, raw_name, language):
@@ -445,273 +3272,805 @@ class LocalChScraper:
                 return raw_name.strip()
         return raw_name.strip()
 
+    # -------------------- LISTING LINKS --------------------
+    def _collect_listing_links(self):
+        """
+        Read the current listing page once and return the detail URLs of all
+        business cards plus the next-page URL (or None).
+        """
+        data = self._extract(LISTING_EXTRACT_JS)
+        if data is not None:
+            return {"detail_urls": data.get("detail_urls") or [], "next_url": data.get("next_url")}
+
+        html = self._healthy_page_source()
+        with self.metrics.time("parse"):
+            return parse_listing_page(html, self.driver.current_url)
+
+    # -------------------- BUSINESS DETAIL --------------------
+    def _scrape_business_detail(self, index, category_name, clean_city, column, language, suffix):
+        """
+        Extract and save the business whose detail page is currently loaded.
+        Returns True if it was saved, False if it was skipped.
+        """
+        # Wait until detail loads (look for h1)
+        self._wait("h1", EC.presence_of_element_located((By.TAG_NAME, "h1")))
+
+        record = self.extract_detail_record()
+        canonical = canonical_url(record["url"])
+        if self._is_duplicate_email(record, suffix):
+            return False
+
+        # Index every extracted page (even without email) so repeats never reload it
+        self.business_index.add(canonical, record)
+        return self._store_business_record(record, index, category_name, clean_city, column, language, suffix)
+
+    def _is_duplicate_email(self, record, suffix):
+        """With dedupe_emails, True if another business page already gave this email."""
+        if not (self.dedupe_emails and record["email"]):
+            return False
+        same_email = self.business_index.url_for_email(record["email"])
+        if same_email and same_email != canonical_url(record["url"]):
+            self.log(f"♻️ {record['email']} already scraped from {same_email} — skipping duplicate", category_suffix=suffix)
+            return True
+        return False
+
+    def _store_business_record(self, record, index, category_name, clean_city, column, language, suffix, reused=False):
+        """Save an extracted detail record under this category/city. Returns True if saved."""
+        email = record["email"]
+
+        if not email:
+            self.metrics.incr("businesses_without_email", letter=column)
+            self.log(f"⚠️ No email found — skipping professional #{index}", category_suffix=suffix)
+            return False
+
+        business_title = record["title"]
+        # Ensure we don’t accidentally get ratings from teaser sliders
+        if not record["rating"] and not reused:
+            self.log("⚠️ No valid main rating found (skipped teaser ratings).", category_suffix=suffix, level=logging.DEBUG)
+
+        business_data = {
+            "title": business_title,
+            "address": record["address"],
+            "rating": record["rating"],
+            "email": email,
+            "category": category_name,
+            "city": clean_city,
+            "url": record["url"]
+        }
+
+        # Save data under the correct suffix (category letter)
+        self._save_business(column, category_name, language, clean_city, business_data, suffix)
+        self.metrics.incr("businesses_saved", letter=column, city=clean_city)
+        if reused:
+            self.metrics.incr("businesses_reused")
+            self.log(f"♻️ Reused already scraped business: {business_title}", category_suffix=suffix)
+        else:
+            self.log(f"💾 Saved business: {business_title}", category_suffix=suffix)
+        return True
+
     # -------------------- VISIT CITY --------------------
     def visit_city_pages(self, cities, category_name, category_slug, column, language):
         suffix = f"_{category_slug[0].lower()}"
 
         for city in cities:
             try:
-                clean_city = self.clean_city_name(city["name"], language)
-                self.driver.get(city["url"])
-                # small wait for page body
-                try:
-                    WebDriverWait(self.driver, 6).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-                except Exception:
-                    pass
+                # Between cities is a safe point to swap a worn-out browser session
+                self.drivers.maintain()
+                self._retry_on_crash(
+                    f"city {city['name']}", self._visit_city, city, category_name, category_slug, column, language, suffix
+                )
+            except Exception as e:
+                self.metrics.incr("errors", stage="city")
+                self.log(f"⚠️ Error visiting {city['url']}: {e}", category_suffix=suffix)
 
-                self.log(f"\n🌆 Opened city: {clean_city}\n", category_suffix=suffix)
+    def _visit_city(self, city, category_name, category_slug, column, language, suffix):
+        city_key = self._city_key(column, category_name, city)
+        clean_city = self.clean_city_name(city["name"], language)
+        max_pages = self.plan.max_pages(column, category_slug, language, clean_city)
+        if self.frontier.is_done("city", city_key):
+            self.log(f"⏭️ City already done: {clean_city}", category_suffix=suffix)
+            return
 
-                page_number = 1
-                while True:
-                    self.log(f"📄 Scraping page {page_number} for {clean_city}", category_suffix=suffix)
+        # Resume from the last listing page reached by a previous run
+        _, progress = self.frontier.get("page", city_key)
+        page_url = progress["url"] if progress else city["url"]
+        page_number = progress["page"] if progress else 1
+        self.frontier.mark("city", city_key, CrawlFrontier.IN_PROGRESS)
+
+        city_started = time.monotonic()
+        business_prefix = f"{column}/{category_name}/{clean_city}|"
+        failed = self.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            # Page progress has moved past these, so they are retried by URL
+            self.log(f"🔁 Retrying {len(failed)} failed businesses in {clean_city}", category_suffix=suffix)
+            self._visit_detail_urls(
+                [key[len(business_prefix):] for key in failed], category_name, clean_city, column, language, suffix
+            )
+        if self.direct_detail and self.http_first:
+            # Listing pages are read over HTTP ahead of the detail visits
+            page_url, page_number = self._pipeline_city_pages(
+                city_key, page_url, page_number, max_pages, category_name, clean_city, column, language, suffix
+            )
+        if page_url:
+            self._browse_city_pages(
+                city_key, page_url, page_number, max_pages, category_name, clean_city, column, language, suffix
+            )
 
-                    # get business cards
-                    business_cards = self.driver.find_elements(By.XPATH, "//article[contains(@data-testid, 'list-element-desktop')]")
-                    total_cards = len(business_cards)
+        failed = self.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            # Retried businesses are only marked done once their records are synced
+            self._journal(suffix, dirty=False).flush()
+            failed = self.frontier.keys("business", CrawlFrontier.FAILED, business_prefix)
+        if failed:
+            self.log(f"⏸️ City {clean_city} left pending: {len(failed)} businesses failed", category_suffix=suffix)
+        else:
+            self._mark_durable(suffix, "city", city_key, CrawlFrontier.DONE)
+        if self.drivers.current is not None:
+            self.resource_blocker.collect(self.drivers.current)
+        self.metrics.observe("city", time.monotonic() - city_started, letter=column, city=clean_city)
 
-                    self._recover_from_application_error()
-                    
-                    self.log(f"🔍 Found {total_cards} businesses on page {page_number}.", category_suffix=suffix)
+    def _pipeline_city_pages(self, city_key, page_url, page_number, max_pages,
+                             category_name, clean_city, column, language, suffix, lookahead=3):
+        """
+        Producer/consumer over one city's listing: a thread walks the listing
+        pages over HTTP, up to `lookahead` pages ahead, while this session
+        opens the detail pages of the pages already read. Returns the
+        (url, page_number) the browser has to continue from when a listing
+        page could not be read over HTTP, or (None, None) when the city is done.
+        """
+        pages = queue.Queue(maxsize=lookahead)
+        stop = threading.Event()
 
-                    if not business_cards:
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            url, number = page_url, page_number
+            try:
+                while url and not stop.is_set():
+                    with self.metrics.time("http_get"):
+                        final_url, html = self.http.get(url)
+                    self.metrics.incr("pages", source="http")
+                    self._archive_page(url, html, final_url, source="http")
+                    links = None if is_application_error(html) else parse_listing_page(html, final_url)
+                    if not put((number, url, links)) or not links or not links["detail_urls"]:
+                        return
+                    if max_pages and number >= max_pages:
                         break
+                    url, number = links["next_url"], number + 1
+            except Exception as e:
+                self.log(f"↩️ Listing prefetch failed ({e}), using browser", category_suffix=suffix)
+                put((number, url, None))
+            finally:
+                put(None)
 
-                    for index in range(1, total_cards + 1):
-                        try:
-                            # refresh list each iteration to avoid stale elements
-                            business_cards = self.driver.find_elements(By.XPATH, "//article[contains(@data-testid, 'list-element-desktop')]")
-                            business = business_cards[index - 1]
-
-                            # Flexible selector for the business title
-                            h2_element = None
-                            try:
-                                h2_element = business.find_element(By.XPATH, ".//h2[@data-testid='title']")
-                            except Exception:
-                                try:
-                                    h2_element = business.find_element(By.XPATH, ".//h2[contains(@class,'lk')]")
-                                except Exception:
-                                    self.log(f"⚠️ No title element for business #{index} — skipping.", category_suffix=suffix)
-                                    continue
-
-                            # Scroll into view and click
-                            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", h2_element)
-                            time.sleep(0.3)
-                            try:
-                                WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable((By.XPATH, ".")), message=None)
-                            except Exception:
-                                pass
-
-                            try:
-                                h2_element.click()
-                            except Exception:
-                                try:
-                                    self.driver.execute_script("arguments[0].click();", h2_element)
-                                except Exception:
-                                    pass
-
-                            # Wait until detail loads (look for h1)
-                            try:
-                                WebDriverWait(self.driver, 6).until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
-                            except Exception:
-                                pass
-
-                            # Extract data
-                            email = self.extract_email_from_detail()
-                            address = self.extract_address_from_detail()
-
-                            if not email:
-                                self.log(f"⚠️ No email found — skipping professional #{index}", category_suffix=suffix)
-                                try:
-                                    self.driver.back()
-                                except Exception:
-                                    pass
-                                time.sleep(0.6)
-                                continue
-
-                            detail_soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                            business_title = detail_soup.find("h1").get_text(strip=True) if detail_soup.find("h1") else None
-                            # business_rating_tag = detail_soup.select_one("span[data-testid='average-rating']")
-                            # business_rating = business_rating_tag.get_text(strip=True) if business_rating_tag else None
-
-                            business_rating = None
-
-                            # Select the main ratings section, ignoring teaser sliders
-                            rating_section = detail_soup.select_one("div[data-testid='ratings-section']")
-                            if rating_section:
-                                rating_tag = rating_section.select_one("span[data-testid='average-rating']")
-                                if rating_tag:
-                                    business_rating = rating_tag.get_text(strip=True)
-
-                            # Ensure we don’t accidentally get ratings from teaser sliders
-                            if not business_rating:
-                                self.log("⚠️ No valid main rating found (skipped teaser ratings).")
-
-                            business_data = {
-                                "title": business_title,
-                                "address": address,
-                                "rating": business_rating,
-                                "email": email,
-                                "category": category_name,
-                                "city": clean_city,
-                                "url": self.driver.current_url
-                            }
+        threading.Thread(target=produce, name="listing-prefetch", daemon=True).start()
+        self.log(f"\n🌆 Opened city: {clean_city}\n", category_suffix=suffix)
+        try:
+            while True:
+                item = pages.get()
+                if item is None:
+                    return None, None
+                number, url, links = item
+                if not links or not links["detail_urls"]:
+                    # No cards in the HTTP response: let the browser take over from this page
+                    self.metrics.incr("http_fallbacks")
+                    return url, number
+
+                self.log(f"📄 Scraping page {number} for {clean_city}", category_suffix=suffix)
+                self.log(f"🔍 Found {len(links['detail_urls'])} businesses on page {number}.", category_suffix=suffix)
+                self._visit_detail_urls(links["detail_urls"], category_name, clean_city, column, language, suffix)
+
+                next_url = links["next_url"]
+                if not next_url:
+                    self.log("✅ No next page URL found — finishing pagination.", category_suffix=suffix)
+                    return None, None
+                if max_pages and number >= max_pages:
+                    self.log(f"✂️ Page limit {max_pages} reached for {clean_city}", category_suffix=suffix)
+                    return None, None
+                # Progress only moves once this page's businesses are done, so resume never skips any
+                self._mark_durable(suffix, "page", city_key, CrawlFrontier.IN_PROGRESS, {"url": next_url, "page": number + 1})
+        finally:
+            stop.set()
+
+    def _browse_city_pages(self, city_key, page_url, page_number, max_pages,
+                           category_name, clean_city, column, language, suffix):
+        """Walk a city's listing pages in the browser, starting at `page_url`."""
+        self._page_get(page_url)
+        self._wait_for_listing()
+
+        self.log(f"\n🌆 Opened city: {clean_city} (browser)\n", category_suffix=suffix)
+
+        while True:
+            self.log(f"📄 Scraping page {page_number} for {clean_city}", category_suffix=suffix)
+
+            detail_urls, next_url = [], None
+            if self.direct_detail:
+                # One pass over the listing: detail hrefs + next page, then direct visits
+                links = self._collect_listing_links()
+                detail_urls, next_url = links["detail_urls"], links["next_url"]
+
+            if detail_urls:
+                self.log(f"🔍 Found {len(detail_urls)} businesses on page {page_number}.", category_suffix=suffix)
+                self._visit_detail_urls(detail_urls, category_name, clean_city, column, language, suffix)
+            else:
+                # Cards without usable hrefs (or direct mode disabled): click through them
+                if not self.direct_detail:
+                    self._recover_from_application_error()
+                business_cards = self.driver.find_elements(By.XPATH, "//article[contains(@data-testid, 'list-element-desktop')]")
+                self.log(f"🔍 Found {len(business_cards)} businesses on page {page_number}.", category_suffix=suffix)
+                if not business_cards:
+                    break
+
+                self._click_through_cards(len(business_cards), category_name, clean_city, column, language, suffix)
+                next_url = self._find_next_page_url(suffix)
+
+            if not next_url:
+                self.log("✅ No next page URL found — finishing pagination.", category_suffix=suffix)
+                break
+            if max_pages and page_number >= max_pages:
+                self.log(f"✂️ Page limit {max_pages} reached for {clean_city}", category_suffix=suffix)
+                break
+
+            self.log(f"➡️ Navigating to next page: {next_url}", category_suffix=suffix)
+            self._page_get(next_url)
+            page_number += 1
+            self._mark_durable(suffix, "page", city_key, CrawlFrontier.IN_PROGRESS, {"url": next_url, "page": page_number})
+            self._wait_for_listing()
+
+    def _visit_detail_urls(self, detail_urls, category_name, clean_city, column, language, suffix):
+        """Open each business detail page directly by URL (no list re-render, no back())."""
+        for index, detail_url in enumerate(detail_urls, start=1):
+            business_key = f"{column}/{category_name}/{clean_city}|{detail_url}"
+            if self.frontier.is_done("business", business_key):
+                continue
+            try:
+                cached = self.business_index.get(canonical_url(detail_url))
+                if cached is not None:
+                    saved = self._store_business_record(cached, index, category_name, clean_city, column, language, suffix, reused=True)
+                else:
+                    # Every detail visit starts from a fresh page load, so the session can be swapped here
+                    self.drivers.maintain()
+                    saved = self._retry_on_crash(
+                        f"business #{index}", self._visit_detail_url,
+                        detail_url, index, category_name, clean_city, column, language, suffix
+                    )
+                self._mark_durable(suffix, "business", business_key, CrawlFrontier.DONE, {"saved": saved})
+            except Exception as e:
+                self.metrics.incr("errors", stage="business")
+                self.log(f"⚠️ Error scraping business #{index} in {clean_city}: {e}", category_suffix=suffix)
+                self.frontier.mark("business", business_key, CrawlFrontier.FAILED, {"error": str(e)})
+
+    def _visit_detail_url(self, detail_url, index, category_name, clean_city, column, language, suffix):
+        self._page_get(detail_url)
+        saved = self._scrape_business_detail(index, category_name, clean_city, column, language, suffix)
+        # Also index under the listing href in case the page redirected
+        if canonical_url(detail_url) != canonical_url(self.driver.current_url):
+            cached = self.business_index.get(canonical_url(self.driver.current_url))
+            if cached is not None:
+                self.business_index.add(canonical_url(detail_url), cached)
+            if self.archive is not None and not self.replay:
+                # Reading page_source is a full DOM round trip, only worth it when recording
+                self._archive_page(detail_url, self.driver.page_source, self.driver.current_url)
+        return saved
+
+    def _click_through_cards(self, total_cards, category_name, clean_city, column, language, suffix):
+        """Legacy navigation: click each card title, scrape, then go back to the list."""
+        for index in range(1, total_cards + 1):
+            try:
+                # One round trip: re-find the card (the list re-renders after back()), scroll, click its title
+                if not self.driver.execute_script(CLICK_CARD_JS, index - 1):
+                    self.log(f"⚠️ No title element for business #{index} — skipping.", category_suffix=suffix)
+                    continue
 
-                            # Save data under the correct suffix (category letter)
-                            self.final_data.setdefault(column, {}).setdefault(category_name, {}).setdefault("language", language)
-                            self.final_data[column][category_name].setdefault(clean_city, []).append(business_data)
+                self.metrics.incr("pages", source="browser")
+                self.drivers.page_loaded()
+                self._scrape_business_detail(index, category_name, clean_city, column, language, suffix)
 
-                            # Ensure 'scraping_data' directory exists
-                            output_dir = os.path.join(os.getcwd(), "scraping_data")
-                            os.makedirs(output_dir, exist_ok=True)
+                # go back to list
+                try:
+                    self.driver.back()
+                except Exception:
+                    pass
+                self._wait_for_listing()
 
-                            # Save inside scraping_data folder
-                            filename = f"localch_live{suffix}.json"
-                            file_path = os.path.join(output_dir, filename)
+            except Exception as e:
+                if is_session_crash(e):
+                    raise  # the city is re-run on a new session
+                self.metrics.incr("errors", stage="business")
+                self.log(f"⚠️ Error scraping business #{index} in {clean_city}: {e}", category_suffix=suffix)
+                try:
+                    self.driver.back()
+                except Exception:
+                    pass
+                self._wait_for_listing()
 
-                            # Additional check for application error
-                            self._recover_from_application_error()
+    def _find_next_page_url(self, suffix):
+        try:
+            next_page_anchor = self.driver.find_element(
+                By.XPATH, "//a[.//button[@id='load-next-page' and not(@disabled)]]"
+            )
+            return next_page_anchor.get_attribute("href")
+        except Exception as e:
+            if is_session_crash(e):
+                raise  # not the end of the listing
+            self.log(f"✅ No next page found: {e}", category_suffix=suffix)
+            return None
 
-                            self.save_to_json(self.final_data, file_path)
+    # -------------------- PERSISTENCE --------------------
+    def _journal(self, suffix, dirty=True):
+        """Return the journal for a category suffix, opening it on first use."""
+        with self._lock:
+            journal = self._journals.get(suffix)
+            opened = journal is None
+            if opened:
+                journal = JsonlJournal(os.path.join(self.output_dir, f"localch_live{suffix}.jsonl"), truncate=not self.resume)
+                self._journals[suffix] = journal
+            if dirty:
+                self._dirty_journals.add(suffix)
+        if opened:
+            # The journal is the only copy until compaction, so it is snapshotted too
+            self.schedule_backup(journal.path)
+        return journal
+
+    def _mark_durable(self, suffix, kind, key, status, data=None):
+        """
+        Frontier update that only lands once the journal records written
+        before it are fsync'ed, so a killed run never skips unsaved work.
+        """
+        self._journal(suffix, dirty=False).after_sync(lambda: self.frontier.mark(kind, key, status, data))
+
+    def _save_category(self, column, category_name, language, translations, suffix):
+        self.tally.add_category(column, category_name, language)
+        self._journal(suffix).append({
+            "type": "category",
+            "column": column,
+            "category": category_name,
+            "language": language,
+            "translations": translations,
+        })
+        if self.exporter is not None:
+            self.exporter.category(category_name, translations)
+
+    def _save_business(self, column, category_name, language, city, business_data, suffix):
+        self.tally.add_business(column, category_name, language, city)
+        self._journal(suffix).append({
+            "type": "business",
+            "column": column,
+            "category": category_name,
+            "language": language,
+            "city": city,
+            "business": business_data,
+        })
+        if self.exporter is not None:
+            self.exporter.business(column, category_name, language, city, business_data)
+
+    def compact_journal(self, suffix):
+        """
+        Rebuild scraping_data/localch_live<suffix>.json from its journal.
+        A first pass groups the journal offsets of the businesses into a
+        column → (category, language) → city layout; save_to_json then reads
+        each business back from the journal as it writes it, so only the
+        offsets are held in memory.
+        """
+        journal_path = os.path.join(self.output_dir, f"localch_live{suffix}.jsonl")
+        journal = self._journals.get(suffix)
+        if journal is not None:
+            journal.flush()
+
+        data = {}
+        for offset, record in JsonlJournal.scan(journal_path):
+            column = data.setdefault(record["column"], {})
+            # Extra plan languages of a slug are separate categories in the output
+            category = column.setdefault((record["category"], record.get("language", "en")), {})
+            if record["type"] == "category":
+                category["translations"] = record.get("translations") or {}
+            elif record["type"] == "business":
+                category.setdefault(record["city"], array("q")).append(offset)
+
+        if not data:
+            return None
 
-                            
-                            # filename = f"localch_live{suffix}.json"
-                            # self.save_to_json(self.final_data, filename)
-                            self.log(f"💾 Saved business: {business_title}", category_suffix=suffix)
+        file_path = os.path.join(self.output_dir, f"localch_live{suffix}.json")
+        with open(journal_path, "rb") as f, self.metrics.time("save_to_json"):
+            for column in data.values():
+                for category in column.values():
+                    for city, offsets in category.items():
+                        if city != "translations":
+                            category[city] = (JsonlJournal.read_at(f, offset)["business"] for offset in offsets)
+            self.save_to_json(data, file_path)
+        self.log(f"🗜️ Compacted journal into {file_path}", category_suffix=suffix)
+        return file_path
+
+    def compact_all(self):
+        """Compact every journal that received records since the last compaction."""
+        with self._lock:
+            dirty = set(self._dirty_journals)
+            self._dirty_journals.clear()
+        for suffix in sorted(dirty):
+            try:
+                self.compact_journal(suffix)
+            except Exception as e:
+                self.log(f"⚠️ Failed to compact journal{suffix}: {e}")
 
-                            # go back to list
-                            try:
-                                self.driver.back()
-                            except Exception:
-                                pass
-                            time.sleep(0.8)
+    def flush_journals(self):
+        for journal in list(self._journals.values()):
+            journal.flush()
 
-                        except Exception as e:
-                            self.log(f"⚠️ Error scraping business #{index} in {clean_city}: {e}", category_suffix=suffix)
-                            try:
-                                self.driver.back()
-                            except Exception:
-                                pass
-                            time.sleep(0.8)
+    def close_journals(self):
+        for journal in self._journals.values():
+            journal.close()
 
-                    # Handle pagination safely
-                    try:
-                        next_page_anchor = self.driver.find_element(
-                            By.XPATH, "//a[.//button[@id='load-next-page' and not(@disabled)]]"
-                        )
-                        next_url = next_page_anchor.get_attribute("href")
-                        if not next_url:
-                            self.log("✅ No next page URL found — finishing pagination.", category_suffix=suffix)
-                            break
+    # -------------------- SAVE JSON --------------------
+    def save_to_json(self, data, filename):
+        """
+        Write column → (category, language) → city → businesses in the output layout.
+        Entries are generated while writing, so no second formatted copy
+        of the data is built.
+        """
+        def categories():
+            for col, column_categories in data.items():
+                for (category_name, language), category_data in column_categories.items():
+                    translations = category_data.get("translations") or {}
+                    category_entry = {
+                        "name_en": translations.get("name_en"),
+                        "name_de": translations.get("name_de"),
+                        "name_fr": translations.get("name_fr"),
+                        "name_it": translations.get("name_it"),
+                        "slug": category_name.lower().replace(" ", "-"),
+                        "language": language,
+                    }
+                    yield category_entry, cities(category_data)
+
+        def cities(category_data):
+            # Skip non-city keys
+            for city_name, professionals in category_data.items():
+                if city_name == "translations":
+                    continue
+                yield city_name, (professional(business, city_name) for business in professionals)
+
+        def professional(business, city_name):
+            return {
+                "title": business.get("title"),
+                "address": business.get("address"),
+                "rating": business.get("rating"),
+                "email": business.get("email"),
+                "category": business.get("category"),
+                "city": city_name,
+                "url": business.get("url")
+            }
+
+        # Write to a temp file and swap it in, so readers/snapshots never see a partial file
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            write_categories_json(f, categories())
+        os.replace(tmp_filename, filename)
+
+        # ✅ Include the file in the periodic snapshots
+        self.schedule_backup(filename)
 
-                        self.log(f"➡️ Navigating to next page: {next_url}", category_suffix=suffix)
-                        self.driver.get(next_url)
-                        page_number += 1
-                        # wait small amount for new page
-                        time.sleep(1.0)
+    # -------------------- RUN --------------------
+    def process_category(self, letter, cat_data):
+        """Scrape one category: translations, subletters, cities and their businesses."""
+        suffix = f"_{letter.lower()}"
+        slug = cat_data["slug"]
+        name = cat_data["name"]
+        lang = cat_data["language"]
 
-                    except Exception as e:
-                        self.log(f"✅ No next page found or error navigating: {e}", category_suffix=suffix)
-                        break
+        category_key = self._category_key(letter, cat_data)
+        if self.frontier.is_done("category", category_key):
+            self.log(f"⏭️ Category already done: {name}", category_suffix=suffix)
+            return True
 
-            except Exception as e:
-                self.log(f"⚠️ Error visiting {city['url']}: {e}", category_suffix=suffix)
+        self.log(f"\n🔍 Category: {name} ({lang})", category_suffix=suffix)
+        self.frontier.mark("category", category_key, CrawlFrontier.IN_PROGRESS)
 
-    # -------------------- SAVE JSON --------------------
-    def save_to_json(self, data, filename):
-        formatted = {"categories": []}
-
-        for col, categories in data.items():
-            for category_name, category_data in categories.items():
-                language = category_data.get("language", "en")
-                translations = category_data.get("translations", {})
-
-                category_entry = {
-                    "name_en": translations.get("name_en"),
-                    "name_de": translations.get("name_de"),
-                    "name_fr": translations.get("name_fr"),
-                    "name_it": translations.get("name_it"),
-                    "slug": category_name.lower().replace(" ", "-"),
-                    "language": language,
-                    "cities": []
-                }
+        # Continue using your existing logic:
+        letters = self.get_letters(cat_data)
 
-                # Skip non-city keys
-                for city_name, professionals in category_data.items():
-                    if city_name in ("language", "translations"):
-                        continue
-                    if not isinstance(professionals, list):
-                        continue
-
-                    city_entry = {"name": city_name, "professionals": []}
-                    for business in professionals:
-                        city_entry["professionals"].append({
-                            "title": business.get("title"),
-                            "address": business.get("address"),
-                            "rating": business.get("rating"),
-                            "email": business.get("email"),
-                            "category": business.get("category"),
-                            "city": city_name,
-                            "url": business.get("url")
-                        })
-                    category_entry["cities"].append(city_entry)
-
-                formatted["categories"].append(category_entry)
-
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(formatted, f, indent=2, ensure_ascii=False)
-
-        # ✅ Start backup scheduler once per file
-        if not hasattr(self, "_backup_started"):
-            self._backup_started = set()
-
-        if filename not in self._backup_started:
-            try:
-                print(f"[🕒] Starting automatic backups every 30 minutes for {filename}")
-                self.schedule_backup(filename)
-                self._backup_started.add(filename)
-            except Exception as e:
-                print(f"[⚠️] Failed to schedule backup for {filename}: {e}")
+        # Category names in 4 languages, from hreflang/localized pages (cached per slug)
+        translations = self.fetch_category_translations(cat_data)
+        self._save_category(letter, name, lang, translations, f"_{slug[0].lower()}")
 
-    # -------------------- RUN --------------------
-    def run(self):
-        letter_links = self.get_category_letters()
+        if not letters:
+            self.log(f"⚠️ No subletters found for {name}", category_suffix=suffix)
+            self.frontier.mark("category", category_key, CrawlFrontier.DONE)
+            self.tally.release(letter, name, lang)
+            return True
+
+        cities_by_subletter = {}
+        for subletter in letters:
+            subletter_key = f"{category_key}/{subletter}"
+            if self.frontier.is_done("subletter", subletter_key):
+                continue
 
-        for letter_data in letter_links:
-            letter = letter_data["letter"]
-            suffix = f"_{letter.lower()}"
-            self.final_data[letter] = {}
+            cities = self.get_cities_for_letter(cat_data, subletter)
+            if cities is not None:
+                cities = self._planned_cities(letter, cat_data, cities)
+            if cities:
+                self.visit_city_pages(cities, name, slug, letter, lang)
+            cities_by_subletter[subletter_key] = cities
 
-            categories = self.get_categories_for_letter(letter_data)
-            if not categories:
-                self.log(f"⚠️ No categories found for letter {letter}", category_suffix=suffix)
+        return self._finish_category(letter, cat_data, cities_by_subletter)
+
+    def _finish_category(self, letter, cat_data, cities_by_subletter):
+        """
+        Flush the category's journal, then mark done the subletters whose
+        cities the frontier shows as all done, and the category if that is
+        all of them. Anything else stays pending so a resumed run goes back
+        to it. `cities_by_subletter` maps subletter keys to their planned
+        cities (None when the city list could not be read).
+        """
+        name, lang = cat_data["name"], cat_data["language"]
+        suffix = f"_{cat_data['slug'][0].lower()}"
+        # Deferred frontier marks are applied by the flush, so the frontier is current below
+        city_count, business_count = self._release_category(letter, name, lang, suffix)
+
+        pending = 0
+        for subletter_key, cities in cities_by_subletter.items():
+            if cities is None:
+                pending += 1
                 continue
+            left = sum(1 for city in cities if not self.frontier.is_done("city", self._city_key(letter, name, city)))
+            if left:
+                pending += left
+            else:
+                self.frontier.mark("subletter", subletter_key, CrawlFrontier.DONE)
+
+        if pending:
+            self.log(f"⏸️ Category {name} ({lang}) left pending: {pending} cities unfinished, "
+                     f"{business_count} businesses saved", category_suffix=suffix)
+            return False
+        self.frontier.mark("category", self._category_key(letter, cat_data), CrawlFrontier.DONE)
+        self.log(f"✅ Category {name} ({lang}) done: {business_count} businesses in {city_count} cities",
+                 category_suffix=suffix)
+        return True
+
+    def _release_category(self, column, category_name, language, suffix):
+        """Make sure a category's journal is on disk and drop its counters; returns (cities, businesses)."""
+        counts = self.tally.counts(column, category_name, language)
+        self._journal(suffix).flush()
+        self.tally.release(column, category_name, language)
+        return counts
+
+    @staticmethod
+    def _city_key(column, category_name, city):
+        return f"{column}/{category_name}/{city['url']}"
+
+    def _category_key(self, letter, cat_data):
+        key = f"{letter}/{cat_data['slug']}"
+        # Extra languages added by the crawl plan are tracked separately
+        return f"{key}@{cat_data['language']}" if "base_language" in cat_data else key
+
+    def _planned_categories(self, letter, categories):
+        """
+        Drop categories the crawl plan excludes or that belong to another
+        shard; add one entry per extra planned language.
+        """
+        planned = []
+        for cat_data in categories:
+            if self.shard and shard_for(f"{letter}/{cat_data['slug']}", self.shard[1]) != self.shard[0]:
+                continue
+            for lang in self.plan.languages_for(letter, cat_data["slug"], cat_data["language"]):
+                if lang == cat_data["language"]:
+                    planned.append(cat_data)
+                else:
+                    planned.append(dict(cat_data, language=lang, base_language=cat_data["language"]))
+        return planned
 
-            for cat_data in categories:
-                slug = cat_data["slug"]
-                name = cat_data["name"]
-                lang = cat_data["language"]
+    def _letter_categories(self, letter_data):
+        """Planned categories of a letter; logs why there are none."""
+        letter = letter_data["letter"]
+        suffix = f"_{letter.lower()}"
+        categories = self.get_categories_for_letter(letter_data)
+        if not categories:
+            self.log(f"⚠️ No categories found for letter {letter}", category_suffix=suffix)
+            return []
+        planned = self._planned_categories(letter, categories)
+        if not planned:
+            where = f"shard {self.shard[0]}/{self.shard[1]}" if self.shard else "the crawl plan"
+            self.log(f"⏭️ Letter {letter}: none of its {len(categories)} categories are in {where}", category_suffix=suffix)
+        return planned
+
+    def _planned_cities(self, letter, cat_data, cities):
+        if not self.plan:
+            return cities
+        lang = cat_data["language"]
+        return [
+            city for city in cities
+            if self.plan.allows(letter, cat_data["slug"], lang, self.clean_city_name(city["name"], lang))
+        ]
 
-                self.log(f"\n🔍 Category: {name} ({lang})", category_suffix=suffix)
+    def run(self, workers=1):
+        if workers > 1:
+            return self.run_parallel(workers)
 
-                # Continue using your existing logic:
-                letters = self.get_letters(cat_data)
+        # Even after a crash the journals are synced and compacted and the exports closed
+        try:
+            letter_links = self.get_category_letters()
+
+            for letter_data in letter_links:
+                letter = letter_data["letter"]
+                suffix = f"_{letter.lower()}"
 
-                # Fetch category names in 4 languages (this will switch languages and return to EN)
-                translations = self.fetch_multilang_categories()
-                self.final_data[letter][name] = {"translations": translations, "language": lang}
+                if self.frontier.is_done("letter", letter):
+                    self.log(f"⏭️ Letter already done: {letter}", category_suffix=suffix)
+                    continue
+                if not self.plan.allows(letter):
+                    self.log(f"⏭️ Letter {letter} not in crawl plan", category_suffix=suffix)
+                    continue
 
-                if not letters:
-                    self.log(f"⚠️ No subletters found for {name}", category_suffix=suffix)
+                categories = self._letter_categories(letter_data)
+                if not categories:
                     continue
 
-                for subletter in letters:
-                    cities = self.get_cities_for_letter(cat_data, subletter)
-                    if not cities:
-                        continue
+                complete = True
+                with self.metrics.time("letter", letter=letter):
+                    for cat_data in categories:
+                        if not self._retry_on_crash(f"category {cat_data['name']}", self.process_category, letter, cat_data):
+                            complete = False
+
+                if complete:
+                    self.frontier.mark("letter", letter, CrawlFrontier.DONE)
+                # Letter finished: rewrite its JSON snapshot once from the journal, then drop it from memory
+                self.compact_all()
+                self.tally.release(letter)
+        except BaseException as e:
+            # Logged here: finish_run closes the log backend
+            self.log(f"❌ Run aborted: {e!r}", level=logging.ERROR)
+            raise
+        finally:
+            self.finish_run()
+
+    def finish_run(self):
+        self.compact_all()
+        self.close_journals()
+        self.snapshots.stop()
+        self.log_wait_stats()
+        self.log(f"🗂️ Frontier: {self.frontier.counts()}")
+        self.log(f"🧮 Categories: {self.tally.summary()}")
+        for host, stat in self.governor.summary().items():
+            self.log(f"🚦 Governor[{host}]: {stat}")
+        self.quit_driver()
+        net = self.resource_blocker.summary()
+        if net["requests"]:
+            self.log(
+                f"🚫 Blocking [{self.resource_blocker.profile}]: {net['blocked']}/{net['requests']} requests blocked "
+                f"{net['blocked_by_type']}, ~{net['bytes_saved_est'] / 1e6:.1f} MB saved (est.), "
+                f"{net['bytes_transferred'] / 1e6:.1f} MB transferred"
+            )
+        self.export_metrics()
+        if self.exporter is not None:
+            rows = self.exporter.rows
+            for path in self.exporter.close():
+                self.log(f"📤 Exported {rows} rows → {path}")
+        if self.archive is not None:
+            self.log(f"🗄️ Page archive ({'replay' if self.replay else 'record'}): {self.archive.counts()}")
+            self.archive.close()
+        self.frontier.close()
+        self.business_index.close()
+        self.log_backend.close()
+
+    def export_metrics(self):
+        """Write the Prometheus textfile and JSON summary, and log the headline numbers."""
+        try:
+            extra = {
+                "waits": self.waits.summary(),
+                "network": self.resource_blocker.summary(),
+                "frontier": self.frontier.counts(),
+                "governor": self.governor.summary(),
+                "driver": self.drivers.stats,
+            }
+            prom_path, json_path = self.metrics.export(os.path.join(self.output_dir, "metrics"), self.run_id, extra)
+            summary = self.metrics.summary()
+            self.log(
+                f"📊 {summary['pages']} pages ({summary['pages_per_min']}/min), "
+                f"{summary['businesses']} businesses ({summary['businesses_per_min']}/min), "
+                f"email hit rate {summary['email_hit_rate']}, errors {summary['errors']}, "
+                f"refreshes {summary['refreshes']} → {json_path}"
+            )
+        except Exception as e:
+            self.log(f"⚠️ Failed to export metrics: {e}")
 
-                    self.visit_city_pages(cities, name, slug, letter, lang)
+    def log_wait_stats(self):
+        for name, stat in self.waits.summary().items():
+            self.log(
+                f"⏱️ wait[{name}]: {stat['count']}x avg {stat['avg_s']}s max {stat['max_s']}s "
+                f"total {stat['total_s']}s timeouts {stat['timeouts']}"
+            )
 
-        self.driver.quit()
+    # -------------------- ASYNC RUN --------------------
+    def run_async(self, concurrency=100, rate_per_host=5.0):
+        """Crawl with AsyncCrawlEngine over plain HTTP; no browser is started."""
+        engine = AsyncCrawlEngine(self, concurrency=concurrency, rate_per_host=rate_per_host)
+        try:
+            asyncio.run(engine.crawl())
+        except BaseException as e:
+            # Logged here: finish_run closes the log backend
+            self.log(f"❌ Run aborted: {e!r}", level=logging.ERROR)
+            raise
+        finally:
+            self.log(f"⚡ Async engine stats: {engine.stats}")
+            self.finish_run()
+
+    # -------------------- PARALLEL RUN --------------------
+    def run_parallel(self, workers, compact_interval=300):
+        """
+        Discover letters and categories on this session, then let `workers`
+        independent Edge sessions drain a shared queue of category tasks.
+        Results go through the shared journals and frontier.
+        """
+        try:
+            tasks = queue.Queue()
+            for letter_data in self.get_category_letters():
+                letter = letter_data["letter"]
+                if self.frontier.is_done("letter", letter) or not self.plan.allows(letter):
+                    continue
+
+                for cat_data in self._letter_categories(letter_data):
+                    if not self.frontier.is_done("category", self._category_key(letter, cat_data)):
+                        tasks.put((letter, cat_data))
+
+            self.log(f"🧵 Queued {tasks.qsize()} category tasks for {workers} workers")
+
+            threads = [
+                threading.Thread(target=self._worker_loop, args=(i, tasks), name=f"localch-worker-{i}", daemon=True)
+                for i in range(1, workers + 1)
+            ]
+            for t in threads:
+                t.start()
+
+            # Refresh the JSON snapshots periodically while workers are busy
+            last_compact = time.monotonic()
+            while any(t.is_alive() for t in threads):
+                for t in threads:
+                    t.join(timeout=5)
+                if time.monotonic() - last_compact >= compact_interval:
+                    self.compact_all()
+                    last_compact = time.monotonic()
+        except BaseException as e:
+            # Logged here: finish_run closes the log backend
+            self.log(f"❌ Run aborted: {e!r}", level=logging.ERROR)
+            raise
+        finally:
+            self.finish_run()
+
+    def _worker_loop(self, worker_id, tasks):
+        try:
+            worker = LocalChScraper(self.excel_path, parent=self, worker_id=worker_id)
+        except Exception as e:
+            self.log(f"❌ Worker {worker_id} failed to start: {e}")
+            return
+
+        worker.log("🚀 Worker started")
+        try:
+            while True:
+                try:
+                    letter, cat_data = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    worker.process_category(letter, cat_data)
+                except Exception as e:
+                    requeues = cat_data.get("requeues", 0)
+                    if requeues < 2 and worker.drivers.handle_crash(e):
+                        worker.flush_journals()
+                        # Back on the queue: the frontier lets whoever picks it up skip the finished cities
+                        worker.log(f"🔁 Re-queueing category {cat_data.get('name')} after a browser crash")
+                        tasks.put((letter, dict(cat_data, requeues=requeues + 1)))
+                    else:
+                        worker.log(f"⚠️ Category {cat_data.get('name')} failed: {e}", category_suffix=f"_{letter.lower()}")
+                finally:
+                    tasks.task_done()
+        finally:
+            worker.log("🏁 Worker finished")
+            worker.quit_driver()
 
     # -------------------- MAIN --------------------
     # export MAILTRAP_HOST="sandbox.smtp.mailtrap.io"
@@ -744,82 +4103,112 @@ class LocalChScraper:
         except Exception as e:
             self.log(f"⚠️ Failed to send Mailtrap alert: {e}")
 
-    def _recover_from_application_error(self, max_refresh=2):
+    def _recover_from_application_error(self, max_refresh=2, html=None):
         """
         Detect if 'Application error' or client-side crash page is shown,
         and try refreshing up to `max_refresh` times.
+        `html` lets the caller pass a page_source it already holds.
         Returns True if recovered successfully, False otherwise.
         """
         try:
-            for attempt in range(max_refresh):
-                html = self.driver.page_source.lower()
-
-                if "application error" in html or "client-side exception" in html:
-                    self.log(f"⚠️ Application error detected (attempt {attempt + 1}/{max_refresh}) → refreshing page...")
-                    self.driver.refresh()
-                    time.sleep(4)
+            for attempt in range(max_refresh + 1):
+                if html is None:
+                    html = self.driver.page_source
 
-                else:
+                if not is_application_error(html):
+                    if attempt:
+                        self.governor.record(urlsplit(self.driver.current_url).netloc, True)
                     return True  # page looks fine
+                if attempt == max_refresh:
+                    break
+
+                host = urlsplit(self.driver.current_url).netloc
+                self.governor.record(host, False, kind="application_error")
+                delay = 0 if self.replay else self.governor.backoff(attempt)
+                self.log(f"⚠️ Application error detected (attempt {attempt + 1}/{max_refresh}) "
+                         f"→ refreshing page in {delay:.1f}s...")
+                self.metrics.incr("application_errors")
+                self.metrics.incr("refreshes")
+                time.sleep(delay)
+                if not self.replay:
+                    self.governor.acquire(host)
+                with self.metrics.time("refresh"):
+                    self.driver.refresh()
+                    self._wait("refresh", page_recovered)
+                self.drivers.page_loaded()
+                html = None
 
+            self.metrics.incr("errors", stage="application_error")
             self.log("❌ Page still broken after refresh attempts.")
             return False
 
         except Exception as e:
+            if is_session_crash(e):
+                raise
             self.log(f"⚠️ Exception during error recovery: {e}")
             return False
 
-    def schedule_backup(self,json_file_path):
+    def schedule_backup(self, json_file_path):
         """
-        Creates timestamped backups of the given JSON file every 30 minutes.
-        Automatically detects the category suffix (A–Z) using regex and
-        places backups inside backup_json/Category_X folders.
+        Register a JSON output or journal with the snapshot service, which
+        backs it up into backup_json/Category_X every `snapshot_interval`
+        seconds.
         """
-        if not os.path.exists(json_file_path):
-            print(f"[⚠️] File {json_file_path} not found for backup.")
-            return
-
-        base_name = os.path.basename(json_file_path)
-        name_without_ext = os.path.splitext(base_name)[0]
-
-        # Extract suffix like "_a" or "_z" using regex
-        match = re.search(r"_([a-zA-Z])$", name_without_ext)
-        if match:
-            suffix = match.group(1).upper()
-        else:
-            suffix = "Unknown"
-
-        # ✅ Root backup folder
-        root_backup = os.path.join(os.path.dirname(json_file_path), "backup_json")
-        os.makedirs(root_backup, exist_ok=True)
-
-        # ✅ Category folder inside backup_json
-        folder_name = f"Category_{suffix}"
-        backup_dir = os.path.join(root_backup, folder_name)
-        os.makedirs(backup_dir, exist_ok=True)
-
-        # ✅ Timestamped backup file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = os.path.join(backup_dir, f"{name_without_ext}_{timestamp}.json")
-
         try:
-            shutil.copy2(json_file_path, backup_file)
-            print(f"[✅] Backup created: {backup_file}")
+            self.snapshots.register(json_file_path)
         except Exception as e:
-            print(f"[❌] Failed to create backup: {e}")
-            # scraper.send_error_email("🚨 Local.ch Scraper Backup Failed", e)
-        
-
-        # Schedule again in 10 minutes (1800 seconds)
-        threading.Timer(600, self.schedule_backup, args=[json_file_path]).start()
+            self.log(f"⚠️ Failed to schedule backup for {json_file_path}: {e}")
+
+
+def parse_args(argv=None):
+    """Command line options; each falls back to its LOCALCH_* environment variable."""
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Scrape local.ch categories, cities and businesses.")
+    parser.add_argument("--shard", default=env("LOCALCH_SHARD"),
+                        help="i/N: crawl only the i-th of N deterministic slices of the categories")
+    parser.add_argument("--engine", choices=["browser", "async"], default=env("LOCALCH_ENGINE") or "browser")
+    parser.add_argument("--workers", type=int, default=int(env("LOCALCH_WORKERS", "1")), help="Edge sessions")
+    parser.add_argument("--concurrency", type=int, default=int(env("LOCALCH_CONCURRENCY", "100")), help="async engine")
+    parser.add_argument("--rate", type=float, default=float(env("LOCALCH_RATE", "5")), help="async requests/sec per host")
+    parser.add_argument("--plan", default=env("LOCALCH_PLAN", "categories.xlsx"), help="crawl plan workbook")
+    parser.add_argument("--base-url", default=env("LOCALCH_BASE_URL", BASE_URL))
+    parser.add_argument("--resume", action="store_true", default=env("LOCALCH_RESUME") == "1")
+    parser.add_argument("--log-level", default=env("LOCALCH_LOG_LEVEL", "INFO"))
+    parser.add_argument("--log-json", action="store_true", default=env("LOCALCH_LOG_JSON") == "1")
+    # LOCALCH_ARCHIVE=record keeps raw pages; =replay re-extracts them without network or browser
+    parser.add_argument("--archive", choices=["record", "replay"], default=env("LOCALCH_ARCHIVE") or None)
+    # e.g. LOCALCH_EXPORT=csv,xlsx,parquet
+    parser.add_argument("--export", default=env("LOCALCH_EXPORT", ""), help="comma-separated: csv,xlsx,parquet")
+    args = parser.parse_args(argv)
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
 
 
 if __name__ == "__main__":
-    scraper = LocalChScraper(excel_path="categories.xlsx")
+    args = parse_args()
+    scraper = LocalChScraper(
+        excel_path=args.plan,
+        base_url=args.base_url,
+        resume=args.resume,
+        log_level=args.log_level,
+        log_json=args.log_json,
+        archive_mode=args.archive,
+        export_formats=[f.strip() for f in args.export.split(",") if f.strip()],
+        shard=args.shard,
+    )
+    if args.shard:
+        scraper.log(f"🧩 Shard {args.shard[0]}/{args.shard[1]} → {scraper.output_dir}")
     try:
-        scraper.run()
+        if args.engine == "async":
+            scraper.run_async(concurrency=args.concurrency, rate_per_host=args.rate)
+        else:
+            scraper.run(workers=args.workers)
     except Exception as e:
-        error_message = f"❌ Scraper crashed!\n\nError: {e}\nTime: {datetime.now()}"
-        scraper.log(error_message)
+        shard = f" (shard {args.shard[0]}/{args.shard[1]})" if args.shard else ""
+        error_message = f"❌ Scraper crashed{shard}!\n\nError: {e}\nTime: {datetime.now()}"
         scraper.send_error_email("🚨 Local.ch Scraper Failed", error_message)
         raise  # Optional: re-raise so system logs show failure
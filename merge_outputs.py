@@ -0,0 +1,65 @@
+"""
+Merge scraper outputs into one de-duplicated dataset with bounded memory.
+
+Reads localch_live_*.json, their backup_json/*.json.gz snapshots and the
+.jsonl journals (directories are searched recursively), newest first, so
+the most recent copy of a professional wins. Within a category,
+professionals are matched by URL and by email; translations are merged.
+
+    python merge_outputs.py scraping_data -o scraping_data/localch_merged.json
+"""
+import os, re, sys, time, argparse
+
+from juste_scraping import OutputMerger
+
+OUTPUT_FILE = re.compile(r"^localch_live.*\.jsonl?(\.gz)?$")
+
+
+def collect_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, _, names in os.walk(path):
+            files.extend(os.path.join(root, name) for name in names if OUTPUT_FILE.match(name))
+    # Newest first: the first copy of a professional added is the one kept
+    return sorted(set(files), key=os.path.getmtime, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge local.ch scraper outputs without loading them into memory.")
+    parser.add_argument("inputs", nargs="*", default=["scraping_data"], help="files or directories")
+    parser.add_argument("-o", "--output", default=os.path.join("scraping_data", "localch_merged.json"),
+                        help="merged JSON (.json or .json.gz)")
+    parser.add_argument("--keep-db", action="store_true", help="keep the SQLite work file next to the output")
+    args = parser.parse_args(argv)
+
+    inputs = [path for path in collect_inputs(args.inputs) if os.path.abspath(path) != os.path.abspath(args.output)]
+    if not inputs:
+        print("⚠️ No scraper outputs found")
+        return 1
+
+    started = time.monotonic()
+    merger = OutputMerger(f"{args.output}.merge.sqlite")
+    try:
+        for path in inputs:
+            try:
+                merger.add_file(path)
+                print(f"📥 {path}")
+            except Exception as e:
+                print(f"⚠️ Skipped {path}: {e}")
+        merger.write_json(args.output)
+    finally:
+        merger.close(keep=args.keep_db)
+
+    stats = merger.stats
+    print(
+        f"✅ Merged {stats['files']} files: {stats['professionals']} professionals, "
+        f"{stats['duplicates']} duplicates dropped → {args.output} ({time.monotonic() - started:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os, sys
+
+# juste_scraping.py and benchmarks/fixture_site.py are plain modules, not an installed package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,94 @@
+from openpyxl import Workbook
+
+import juste_scraping as js
+
+HEADER = ("letter", "category", "language", "city", "action", "max_pages")
+
+
+def load(tmp_path, *rows, sheet="plan"):
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = sheet
+    worksheet.append(HEADER)
+    for row in rows:
+        worksheet.append(row)
+    path = tmp_path / "plan.xlsx"
+    workbook.save(path)
+    messages = []
+    return js.CrawlPlan.load(str(path), log=messages.append), messages
+
+
+def test_missing_workbook_crawls_everything(tmp_path):
+    plan = js.CrawlPlan.load(str(tmp_path / "none.xlsx"))
+    assert not plan
+    assert plan.allows("A", "Bakery", "en", "Bern")
+    assert plan.max_pages("A", "bakery", "en", "Bern") is None
+
+
+def test_include_rules_restrict_the_tree(tmp_path):
+    plan, _ = load(tmp_path, ("A", "Bakery", None, None, "include", None))
+    assert plan.allows("A")
+    assert plan.allows("a", "bakery", "en", "Bern")  # letters and names are case-insensitive
+    assert not plan.allows("B")
+    assert not plan.allows("A", "Butcher")
+
+
+def test_exclude_wins_over_include(tmp_path):
+    plan, _ = load(
+        tmp_path,
+        ("A", None, None, None, "include", None),
+        ("A", "Bakery", None, "Bern", "exclude", None),
+    )
+    assert plan.allows("A", "Bakery", "en", "Zürich")
+    assert plan.allows("A", "Bakery")  # only Bern is excluded, the category still runs
+    assert not plan.allows("A", "Bakery", "en", "Bern")
+
+
+def test_exclude_aliases(tmp_path):
+    plan, _ = load(tmp_path, ("B", None, None, None, "skip", None), ("C", None, None, None, "Excluded", None))
+    assert [rule["action"] for rule in plan.rules] == ["exclude", "exclude"]
+    assert plan.allows("A") and not plan.allows("B") and not plan.allows("C")
+
+
+def test_limit_rules(tmp_path):
+    plan, _ = load(
+        tmp_path,
+        (None, None, None, None, None, 5),
+        ("A", "Bakery", None, "Bern", "limit", 2),
+    )
+    assert [rule["action"] for rule in plan.rules] == ["limit", "limit"]
+    assert plan.allows("Z", "Anything")  # limits do not restrict what is crawled
+    assert plan.max_pages("A", "Bakery", "en", "Bern") == 2
+    assert plan.max_pages("A", "Bakery", "en", "Zürich") == 5
+
+
+def test_include_languages(tmp_path):
+    plan, _ = load(
+        tmp_path,
+        ("A", "Bakery", "DE", None, "include", None),
+        ("A", "Bakery", "fr", None, "include", None),
+        ("B", None, None, None, "include", None),
+    )
+    assert plan.languages_for("A", "Bakery", "en") == ["de", "fr"]
+    assert plan.languages_for("B", "Butcher", "en") == ["en"]
+    assert plan.languages_for("A", "Butcher", "en") == []  # not in the plan at all
+
+
+def test_bad_rows_are_skipped(tmp_path):
+    plan, messages = load(
+        tmp_path,
+        ("A", None, None, None, "include", None),
+        ("A", "Bakery", None, None, "limit", "three"),
+        ("B", None, None, None, "inclde", None),
+    )
+    assert [rule["letter"] for rule in plan.rules] == ["A"]
+    assert len(messages) == 2
+    assert "row 3" in messages[0] and "'three'" in messages[0]
+    assert "row 4" in messages[1] and "'inclde'" in messages[1]
+    assert plan.max_pages("A", "Bakery", "en", "Bern") is None
+
+
+def test_first_sheet_without_plan_sheet(tmp_path):
+    plan, _ = load(tmp_path, ("A", None, None, None, None, None), sheet="Sheet1")
+    assert plan.rules[0]["action"] == "include"
+    assert not plan.allows("B")
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import juste_scraping as js
+
+
+def category(name, language="en", **translations):
+    return {"type": "category", "column": name[0], "category": name, "language": language, "translations": translations}
+
+
+def business(name, city, url, email, language="en", title=None):
+    return {
+        "type": "business", "column": name[0], "category": name, "language": language, "city": city,
+        "business": {"title": title or url, "email": email, "url": url, "city": city},
+    }
+
+
+def journal(path, *records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def merge(tmp_path):
+    """Merge the given input files and return the merged records grouped by (slug, language)."""
+    def run(*paths):
+        merger = js.OutputMerger(str(tmp_path / "merge.sqlite"))
+        try:
+            for path in paths:
+                merger.add_file(path)
+            output = merger.write_json(str(tmp_path / "merged.json"))
+        finally:
+            merger.close()
+        merged = {}
+        for record in js.iter_output_records(output):
+            entry = merged.setdefault((record["slug"], record["language"]), {"translations": None, "businesses": []})
+            if record["type"] == "category":
+                entry["translations"] = record["translations"]
+            else:
+                entry["businesses"].append((record["city"], record["business"]["title"]))
+        return merger.stats, merged
+    return run
+
+
+def test_duplicates_across_inputs(tmp_path, merge):
+    first = journal(
+        tmp_path / "localch_live_a.jsonl",
+        category("Bakery"),
+        business("Bakery", "Bern", "https://www.local.ch/en/d/bern/one?x=1", "one@example.ch", title="first"),
+        business("Bakery", "Bern", "https://www.local.ch/en/d/bern/two", "two@example.ch"),
+    )
+    second = journal(
+        tmp_path / "localch_live_a_old.jsonl",
+        category("Bakery"),
+        # Same page under another query string: same canonical URL
+        business("Bakery", "Bern", "https://www.local.ch/en/d/bern/one", "other@example.ch", title="second"),
+        # Another listing of the same professional: same email, different case
+        business("Bakery", "Thun", "https://www.local.ch/en/d/thun/two", "TWO@example.ch "),
+        business("Bakery", "Thun", "https://www.local.ch/en/d/thun/three", "three@example.ch"),
+    )
+    stats, merged = merge(first, second)
+    assert stats["files"] == 2
+    assert stats["professionals"] == 3 and stats["duplicates"] == 2
+    # The first copy added wins
+    assert merged[("bakery", "en")]["businesses"] == [
+        ("Bern", "first"), ("Bern", "https://www.local.ch/en/d/bern/two"), ("Thun", "https://www.local.ch/en/d/thun/three"),
+    ]
+
+
+def test_translations_merge_field_by_field(tmp_path, merge):
+    path = journal(
+        tmp_path / "localch_live_b.jsonl",
+        category("Butcher", name_en="Butcher", name_de="", name_fr=None),
+        category("Butcher", name_en="Ignored", name_de="Metzgerei", name_fr="Boucherie"),
+        category("Butcher", name_it="Macelleria"),
+    )
+    _, merged = merge(path)
+    assert merged[("butcher", "en")]["translations"] == {
+        "name_en": "Butcher", "name_de": "Metzgerei", "name_fr": "Boucherie", "name_it": "Macelleria",
+    }
+
+
+def test_languages_are_separate_categories(tmp_path, merge):
+    path = journal(
+        tmp_path / "localch_live_c.jsonl",
+        category("Carpenter", "en", name_en="Carpenter"),
+        category("Carpenter", "de", name_de="Schreiner"),
+        business("Carpenter", "Bern", "https://www.local.ch/en/d/bern/wood", "wood@example.ch", "en"),
+        # Same professional crawled for the German plan language: kept in both categories
+        business("Carpenter", "Bern", "https://www.local.ch/de/d/bern/wood", "wood@example.ch", "de"),
+    )
+    stats, merged = merge(path)
+    assert stats["duplicates"] == 0
+    assert sorted(merged) == [("carpenter", "de"), ("carpenter", "en")]
+    assert merged[("carpenter", "de")]["translations"]["name_de"] == "Schreiner"
+    assert merged[("carpenter", "en")]["translations"]["name_de"] is None
+    assert len(merged[("carpenter", "de")]["businesses"]) == len(merged[("carpenter", "en")]["businesses"]) == 1
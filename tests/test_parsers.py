@@ -0,0 +1,69 @@
+import pytest
+
+from fixture_site import FixtureSite
+import juste_scraping as js
+
+BASE = "http://127.0.0.1:8765"
+
+
+@pytest.fixture(scope="module")
+def site():
+    return FixtureSite(businesses=25, page_size=10)
+
+
+@pytest.fixture(scope="module")
+def saved(site, tmp_path_factory):
+    """The HTML samples FixtureSite.dump() writes, read back from disk."""
+    directory = tmp_path_factory.mktemp("pages")
+    return {name: (directory / name).read_text(encoding="utf-8") for name in site.dump(str(directory))}
+
+
+def test_parse_listing_page(saved):
+    page_url = f"{BASE}/en/q/bern-0/acategory0-a"
+    links = js.parse_listing_page(saved["listing.html"], page_url)
+    assert len(links["detail_urls"]) == 10
+    assert links["detail_urls"][0] == f"{BASE}/en/d/bern-0/shared-0"
+    assert links["detail_urls"][1] == f"{BASE}/en/d/bern-0/acategory0-a-bern-0-1"
+    assert links["next_url"] == f"{page_url}?page=2"
+
+
+def test_parse_listing_page_last_page(site):
+    links = js.parse_listing_page(site.listing_page("en", "bern-0", "acategory0-a", 3), f"{BASE}/en/q/bern-0/acategory0-a?page=3")
+    assert len(links["detail_urls"]) == 5
+    assert links["next_url"] is None  # the next button is disabled
+
+
+def test_parse_listing_page_without_cards():
+    assert js.parse_listing_page("<html><body><p>No results</p></body></html>", BASE) == {"detail_urls": [], "next_url": None}
+
+
+def test_parse_detail_page(saved):
+    url = f"{BASE}/en/d/bern-0/acategory0-a-bern-0-1"
+    assert js.parse_detail_page(saved["detail.html"], url) == {
+        "title": "Business acategory0-a-bern-0-1",
+        "address": "Bahnhofstrasse 1, 3000 Bern",
+        "rating": "4.1",  # the main rating, not the teaser slider's
+        "email": "info@acategory0-a-bern-0-1.ch",
+        "url": url,
+    }
+
+
+def test_parse_detail_page_without_email(site):
+    record = js.parse_detail_page(site.detail_page("bern-0", "acategory0-a-bern-0-5"), BASE)
+    assert record["email"] is None
+    assert record["address"] == "Bahnhofstrasse 5, 3000 Bern"
+
+
+def test_discovery_parsers(saved):
+    assert [l["letter"] for l in js.parse_category_letters(saved["categories.html"], f"{BASE}/en/categories")] == ["A", "B"]
+    categories = js.parse_categories(saved["letter.html"], f"{BASE}/en/categories/a")
+    assert [c["slug"] for c in categories] == ["acategory0", "acategory1"]
+    assert js.parse_subletters(saved["category.html"]) == ["a"]
+    cities = js.parse_cities(saved["city_list.html"], BASE)
+    assert [c["name"] for c in cities] == ["Bern", "Zürich"]
+    assert cities[0]["url"] == f"{BASE}/en/q/bern-0/acategory0-a"
+
+
+def test_is_application_error(saved):
+    assert not js.is_application_error(saved["detail.html"])
+    assert js.is_application_error("<h2>Application error: a client-side exception has occurred</h2>")
@@ -0,0 +1,135 @@
+import pytest
+
+import juste_scraping as js
+
+HOST = "www.local.ch"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(js, "time", clock)
+    return clock
+
+
+def governor(**kwargs):
+    messages = []
+    options = dict(min_rate=0.2, max_rate=4.0, increase=0.5, decrease=0.5, min_samples=4, cooldown=30.0)
+    options.update(kwargs)
+    return js.RequestGovernor(log=messages.append, **options), messages
+
+
+def rate(gov):
+    return gov.summary()[HOST]["rate"]
+
+
+def circuit(gov):
+    return gov.summary()[HOST]["circuit"]
+
+
+def test_starts_at_max_rate_and_spaces_requests(clock):
+    gov, _ = governor()
+    assert gov._reserve(HOST) == (0, True)
+    assert gov._reserve(HOST) == (pytest.approx(0.25), True)
+    assert rate(gov) == 4.0
+
+
+def test_aimd_steps(clock):
+    gov, _ = governor(min_samples=100)
+    gov._reserve(HOST)
+    gov.record(HOST, False)
+    assert rate(gov) == 2.0  # multiplicative decrease
+    gov.record(HOST, False)
+    gov.record(HOST, False)
+    assert rate(gov) == 0.5
+    gov.record(HOST, True)
+    assert rate(gov) == 1.0  # additive increase
+    for _ in range(10):
+        gov.record(HOST, False)
+    assert rate(gov) == 0.2  # floor
+    for _ in range(20):
+        gov.record(HOST, True)
+    assert rate(gov) == 4.0  # ceiling
+
+
+def test_circuit_opens_on_error_share(clock):
+    gov, messages = governor()
+    gov.record(HOST, True)
+    gov.record(HOST, False)
+    gov.record(HOST, False)
+    assert circuit(gov) == "closed"  # below min_samples
+    gov.record(HOST, False, kind="application_error")
+    assert circuit(gov) == "open"
+    assert rate(gov) == 0.2
+    assert messages == [f"🛑 Circuit open for {HOST} after 3 application_errors — pausing 30s"]
+
+
+def trip(gov):
+    for _ in range(4):
+        gov.record(HOST, False)
+    assert circuit(gov) == "open"
+
+
+def test_half_open_probe_closes_circuit(clock):
+    gov, messages = governor()
+    trip(gov)
+
+    # The first caller becomes the probe, scheduled for the end of the cooldown
+    delay, granted = gov._reserve(HOST)
+    assert granted and delay == pytest.approx(30.0)
+    assert circuit(gov) == "half_open"
+    clock.now += delay
+
+    # Everyone else polls until the probe reports back
+    assert gov._reserve(HOST) == (gov.poll_interval, False)
+
+    gov.record(HOST, True)
+    assert circuit(gov) == "closed"
+    assert messages[-1] == f"✅ Circuit closed for {HOST}, resuming at 0.7 req/s"
+    # The held callers do not wait another min_rate slot behind the probe
+    assert gov._reserve(HOST) == (0, True)
+
+
+def test_failed_probe_reopens_with_longer_cooldown(clock):
+    gov, messages = governor()
+    trip(gov)
+    clock.now += gov._reserve(HOST)[0]
+
+    gov.record(HOST, False)
+    assert circuit(gov) == "open"
+    assert gov.summary()[HOST]["circuit_opened"] == 2
+    assert messages[-1].endswith("pausing 60s")
+    delay, granted = gov._reserve(HOST)
+    assert granted and delay == pytest.approx(60.0)
+
+
+def test_lost_probe_is_replaced_after_timeout(clock):
+    gov, _ = governor(probe_timeout=10.0)
+    trip(gov)
+    clock.now += gov._reserve(HOST)[0]
+    assert gov._reserve(HOST)[1] is False
+
+    clock.now += 10.0
+    assert gov._reserve(HOST) == (0, True)
+    assert circuit(gov) == "half_open"
+
+
+def test_acquire_resumes_right_after_the_probe(clock):
+    gov, _ = governor(poll_interval=1.0)
+    trip(gov)
+    gov.acquire(HOST)  # the probe, after the cooldown
+    started = clock.now
+    gov.record(HOST, True)
+    gov.acquire(HOST)
+    assert clock.now == started
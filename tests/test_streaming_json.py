@@ -0,0 +1,73 @@
+import io, json, random
+
+import pytest
+
+from juste_scraping import iter_json_events, _json_value, write_categories_json, iter_output_records
+
+CHUNK_SIZES = [1, 2, 3, 5, 7, 64, 1 << 16]
+
+DOCUMENTS = [
+    {"a": 1, "b": -2.5, "c": 1e10, "d": 12345678901234567890, "e": [True, False, None]},
+    [0, -0.25, 3.0e-7, 1E+5, [], {}, [[]], {"": ""}],
+    {"k\"ey": "a\"b\\c", "uni": "é x  ", "long": "x" * 3000, "esc": "\\"},
+    {"categories": [{"slug": "bäcker", "cities": [{"name": "Zürich", "professionals": [{"rating": 4.5}]}]}]},
+    -12.5e-3,
+    "just a string",
+]
+
+
+def parse(text, chunk_size):
+    events = iter_json_events(io.StringIO(text), chunk_size=chunk_size)
+    return _json_value(events, next(events))
+
+
+def random_value(rng, depth=0):
+    r = rng.random()
+    if depth > 3 or r < 0.3:
+        return rng.choice([1, -2.5, 1e10, 0.001, -7e-12, True, False, None, "a\"b\\c", "é", "", 98765432109876543210])
+    if r < 0.65:
+        return {f"k{i}": random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_loads(chunk_size, indent):
+    for document in DOCUMENTS:
+        text = json.dumps(document, indent=indent, ensure_ascii=False)
+        assert parse(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_random_documents_match_json_loads(chunk_size):
+    rng = random.Random(chunk_size)
+    for _ in range(200):
+        text = json.dumps(random_value(rng), indent=rng.choice([None, 1]), ensure_ascii=rng.random() < 0.5)
+        assert parse(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a": "open', '[1, 2] x'])
+def test_invalid_json_raises(text):
+    with pytest.raises((ValueError, StopIteration)):
+        events = iter_json_events(io.StringIO(text), chunk_size=2)
+        _json_value(events, next(events))
+        list(events)
+
+
+def test_output_records_round_trip(tmp_path):
+    professionals = [
+        {"title": "Bäckerei", "address": "Bahnhofstrasse 1", "rating": "4.5", "email": "a@b.ch",
+         "category": "Bakery", "city": "Zürich", "url": "https://www.local.ch/en/d/zurich/a"},
+    ]
+    entry = {"name_en": "Bakery", "name_de": "Bäckerei", "name_fr": None, "name_it": None,
+             "slug": "bakery", "language": "de"}
+    path = tmp_path / "localch_live_b.json"
+    with open(path, "w", encoding="utf-8") as f:
+        write_categories_json(f, [(entry, [("Zürich", iter(professionals))])])
+
+    assert json.loads(path.read_text(encoding="utf-8"))["categories"][0]["cities"][0]["professionals"] == professionals
+    records = list(iter_output_records(str(path)))
+    assert [r["type"] for r in records] == ["business", "category"]
+    assert records[0]["slug"] == "bakery" and records[0]["language"] == "de"
+    assert records[0]["business"] == professionals[0]
+    assert records[1]["translations"]["name_de"] == "Bäckerei"